@@ -0,0 +1,95 @@
+"""Microbenchmark for rendering many resource URLs in one request.
+
+Compares computing the site URL for every resource URL with reusing the
+site URL computed for the first resource URL of the request, and
+resolving the URLs one by one through ``Resources`` with
+``Resources.urls``.
+
+Run with::
+
+    python benchmarks/bench_urls.py
+"""
+import os
+import tempfile
+import timeit
+
+import zope.component.hooks
+from zope.component import provideAdapter
+from zope.interface import Interface
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces.browser import IDefaultBrowserLayer
+from zope.security.checker import NamesChecker
+from zope.traversing.browser.absoluteurl import SiteAbsoluteURL
+from zope.traversing.browser.interfaces import IAbsoluteURL
+
+from zope.browserresource.file import FileResourceFactory
+from zope.browserresource.resource import AbsoluteURL
+from zope.browserresource.resource import Resource
+from zope.browserresource.resources import Resources
+
+
+NUMBER = 2000
+URLS_PER_REQUEST = 60
+
+
+class UncachedAbsoluteURL(AbsoluteURL):
+
+    def _siteURL(self):
+        return self._computeSiteURL(zope.component.hooks.getSite())
+
+
+class Site:
+    __name__ = __parent__ = None
+
+
+def render(factory):
+    request = TestRequest()
+    request._vh_root = site = Site()
+    for i in range(URLS_PER_REQUEST):
+        resource = Resource(request)
+        resource.__parent__ = site
+        resource.__name__ = 'resource%d.css' % i
+        str(factory(resource, request))
+
+
+def one_by_one(names):
+    request = TestRequest()
+    request._vh_root = site = Site()
+    resources = Resources(site, request)
+    return [resources[name]() for name in names]
+
+
+def bulk(names):
+    request = TestRequest()
+    request._vh_root = site = Site()
+    return Resources(site, request).urls(names)
+
+
+def report(name, best):
+    print('%-20s %8.1f us per request with %d URLs'
+          % (name, best / NUMBER * 1e6, URLS_PER_REQUEST))
+
+
+def main():
+    provideAdapter(SiteAbsoluteURL, (Interface, Interface), IAbsoluteURL)
+    for factory in (UncachedAbsoluteURL, AbsoluteURL):
+        timer = timeit.Timer(lambda: render(factory))
+        report(factory.__name__, min(timer.repeat(5, NUMBER)))
+
+    provideAdapter(AbsoluteURL)
+    fd, path = tempfile.mkstemp(suffix='.css')
+    os.close(fd)
+    try:
+        names = ['resource%d.css' % i for i in range(URLS_PER_REQUEST)]
+        for name in names:
+            provideAdapter(FileResourceFactory(path, NamesChecker(), name),
+                           (IDefaultBrowserLayer,), Interface, name)
+        for func in (one_by_one, bulk):
+            timer = timeit.Timer(lambda: func(names))
+            report(func.__name__, min(timer.repeat(5, NUMBER)))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
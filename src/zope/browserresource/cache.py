@@ -0,0 +1,640 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Caches used by browser resources.
+"""
+import functools
+import gzip
+import os
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+
+from zope.component import getGlobalSiteManager
+from zope.interface import implementer
+
+from zope.browserresource.interfaces import IFileMetadataCache
+from zope.browserresource.interfaces import IResourceFactory
+
+
+class LRUCache:
+    """
+    A thread-safe mapping holding at most *maxsize* entries.
+
+    When the cache is full, storing a new entry discards the least
+    recently used one.
+
+        >>> cache = LRUCache(2)
+        >>> cache['a'] = 1
+        >>> cache['b'] = 2
+        >>> cache.get('a')
+        1
+        >>> cache['c'] = 3
+        >>> cache.get('b') is None
+        True
+        >>> sorted(cache.keys())
+        ['a', 'c']
+
+    If a *weigh* function is given, *maxsize* bounds the total weight
+    of the entries instead of their number:
+
+        >>> cache = LRUCache(10, weigh=len)
+        >>> cache['a'] = b'12345'
+        >>> cache['b'] = b'123456'
+        >>> cache.keys()
+        ['b']
+        >>> cache.size
+        6
+
+    A *maxsize* of zero disables the cache.
+
+        >>> cache = LRUCache(0)
+        >>> cache['a'] = 1
+        >>> len(cache)
+        0
+    """
+
+    def __init__(self, maxsize=128, weigh=None):
+        self.maxsize = maxsize
+        self.weigh = weigh
+        #: The number of entries, or their total weight.
+        self.size = 0
+        #: The number of lookups that found an entry.
+        self.hits = 0
+        #: The number of lookups that found no entry.
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _weight(self, value):
+        return 1 if self.weigh is None else self.weigh(value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            data = self._data
+            if key in data:
+                self.size -= self._weight(data[key])
+            data[key] = value
+            data.move_to_end(key)
+            self.size += self._weight(value)
+            while self.size > self.maxsize and data:
+                self.size -= self._weight(data.popitem(last=False)[1])
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data.pop(key)
+            self.size -= self._weight(value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def values(self):
+        with self._lock:
+            return list(self._data.values())
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+#: The content codings `CompressionCache` can produce, mapped to the
+#: functions producing them, in order of preference.
+compressors = {}
+
+try:
+    from compression import zstd
+except ModuleNotFoundError:  # pragma: no cover
+    pass
+else:  # pragma: no cover
+    compressors['zstd'] = zstd.compress
+
+compressors['gzip'] = functools.partial(gzip.compress, mtime=0)
+
+#: Content types, in addition to ``text/*``, that are worth compressing.
+compressible_types = frozenset((
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'application/xhtml+xml',
+    'image/svg+xml',
+))
+
+
+def is_compressible(content_type):
+    """Return whether content of *content_type* is worth compressing.
+
+        >>> is_compressible('text/css')
+        True
+        >>> is_compressible('application/ld+json')
+        True
+        >>> is_compressible('image/png')
+        False
+        >>> is_compressible('font/woff2')
+        False
+
+    """
+    content_type = content_type.split(';')[0].strip().lower()
+    return (content_type.startswith('text/')
+            or content_type in compressible_types
+            or content_type.endswith(('+xml', '+json')))
+
+
+class CompressedFile:
+    """
+    A compressed representation of a `.File`, as returned by
+    `CompressionCache.compress`.
+    """
+
+    resident = True
+
+    def __init__(self, file, data, saved=0):
+        self.data = data
+        self.size = len(data)
+        #: The number of bytes saved by sending this instead of *file*.
+        self.saved = saved
+        self.lmt = file.lmt
+        self.lmh = file.lmh
+
+
+class CompressionCache:
+    """
+    Compressed copies of file resources, bounded by their total size
+    of *max_bytes*.
+
+    Register this as `.FileResource.compression_cache` to compress
+    responses on the fly.
+    """
+
+    #: Files smaller than this many bytes are not compressed.
+    min_size = 1024
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self._cache = LRUCache(max_bytes, weigh=len)
+        self._lock = threading.Lock()
+        #: The content codings that can be produced
+        self.codings = tuple(compressors)
+        #: The number of bytes saved by sending compressed response
+        #: bodies (see `sent`)
+        self.bytes_saved = 0
+
+    @property
+    def hits(self):
+        """The number of responses served from the cache."""
+        return self._cache.hits
+
+    @property
+    def misses(self):
+        """The number of responses that had to be compressed."""
+        return self._cache.misses
+
+    @property
+    def size(self):
+        """The total size of the cached data."""
+        return self._cache.size
+
+    def compressible(self, file):
+        """Return whether *file* should be compressed."""
+        if not getattr(file, 'resident', True):
+            return False
+        return (len(file.data) >= self.min_size
+                and is_compressible(file.content_type))
+
+    def compress(self, file, coding):
+        """
+        Return a `CompressedFile` with the contents of *file*
+        compressed with the content *coding*, or `None` if compressing
+        doesn't make the contents smaller.
+        """
+        data = file.data
+        # Keyed on the contents, as the modification time may be fixed
+        # (see `.File.fixed_lmt`).
+        key = (file.digest, coding)
+        compressed = self._cache.get(key)
+        if compressed is None:
+            compressed = compressors[coding](data)
+            self._cache[key] = compressed
+        saved = len(data) - len(compressed)
+        if saved <= 0:
+            return None
+        return CompressedFile(file, compressed, saved)
+
+    def sent(self, compressed):
+        """
+        Record that the body of a response was the `CompressedFile`
+        *compressed*, counting the bytes saved.
+        """
+        with self._lock:
+            self.bytes_saved += compressed.saved
+
+
+@implementer(IFileMetadataCache)
+class MetadataCache:
+    """
+    The content types and digests of files, stored in the SQLite
+    database at *path* so they survive restarts.
+
+    Set `.File.metadata` to this before the configuration is loaded to
+    avoid sniffing and hashing files that didn't change since they were
+    last loaded. Files known to the cache are not read on startup.
+
+    The database may be shared by several processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30,
+                                   check_same_thread=False,
+                                   isolation_level=None)
+        with self._lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                ' path TEXT PRIMARY KEY,'
+                ' size INTEGER, mtime_ns INTEGER,'
+                ' content_type TEXT, digest TEXT)')
+
+    def _get(self, path, stat):
+        row = self._db.execute(
+            'SELECT content_type, digest FROM files'
+            ' WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if row is None:
+            return None
+        return {key: value
+                for key, value in zip(('content_type', 'digest'), row)
+                if value is not None}
+
+    def lookup(self, path, stat):
+        """See `.IFileMetadataSource`."""
+        with self._lock:
+            return self._get(path, stat)
+
+    def store(self, path, stat, metadata):
+        """See `.IFileMetadataCache`."""
+        with self._lock:
+            stored = self._get(path, stat) or {}
+            stored.update(metadata)
+            self._db.execute(
+                'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime_ns,
+                 stored.get('content_type'), stored.get('digest')))
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+
+class SharedContent:
+    """
+    The contents of a file held by a `ContentStore`, shared by all
+    `.File` objects with the same contents.
+    """
+
+    def __init__(self, data, digest):
+        self.data = data
+        self.digest = digest
+
+
+class ContentStore:
+    """
+    The contents of files, held in memory once for all files with the
+    same contents.
+
+    Set `.File.content_store` to this to share the contents of
+    identical files, like copies of a library registered under several
+    names or in several resource directories. Files that are the same
+    file on disk (following symbolic links) are only read once; files
+    with identical contents are read and hashed, but only one copy of
+    the contents is kept.
+
+    Contents are discarded when no file uses them anymore.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths = weakref.WeakValueDictionary()
+        self._digests = weakref.WeakValueDictionary()
+        #: The number of bytes read from disk
+        self.bytes_read = 0
+        #: The number of bytes not held in memory because they were
+        #: shared with another file
+        self.bytes_saved = 0
+
+    def __len__(self):
+        """The number of different contents held."""
+        return len(self._digests)
+
+    @property
+    def size(self):
+        """The total size of the contents held."""
+        with self._lock:
+            return sum(len(content.data)
+                       for content in self._digests.values())
+
+    def load(self, path, digest_factory, digest=None):
+        """
+        Return the `SharedContent` of the file at *path*.
+
+        If the contents are read, they are hashed with *digest_factory*
+        unless their *digest* is known.
+        """
+        st = os.stat(path)
+        key = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            content = self._paths.get(key)
+            if content is not None:
+                self.bytes_saved += len(content.data)
+                return content
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        if digest is None:
+            hasher = digest_factory()
+            hasher.update(data)
+            digest = hasher.hexdigest()
+
+        with self._lock:
+            self.bytes_read += len(data)
+            content = self._digests.get(digest)
+            if content is None:
+                content = self._digests[digest] = SharedContent(data, digest)
+            else:
+                self.bytes_saved += len(data)
+            self._paths[key] = content
+        return content
+
+    def report(self):
+        """
+        Return a mapping with the number of different contents held
+        (``contents``), their total ``size``, and ``bytes_read`` and
+        ``bytes_saved``.
+        """
+        return {
+            'contents': len(self),
+            'size': self.size,
+            'bytes_read': self.bytes_read,
+            'bytes_saved': self.bytes_saved,
+        }
+
+
+class LRUPolicy:
+    """
+    An eviction policy for `MemoryBudget` choosing the least recently
+    used file.
+    """
+
+    def __init__(self):
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        self._keys[key] = None
+
+    def touch(self, key):
+        self._keys.move_to_end(key)
+
+    def remove(self, key):
+        del self._keys[key]
+
+    def victim(self):
+        """Return the key to evict next, or `None`."""
+        return next(iter(self._keys), None)
+
+
+class LFUPolicy:
+    """
+    An eviction policy for `MemoryBudget` choosing the least frequently
+    used file, and the least recently used one of those used equally
+    often.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._min = 0
+
+    def add(self, key):
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min = 1
+
+    def _unlink(self, key):
+        count = self._counts.pop(key)
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+        return count
+
+    def touch(self, key):
+        count = self._unlink(key) + 1
+        self._counts[key] = count
+        self._buckets.setdefault(count, OrderedDict())[key] = None
+
+    def remove(self, key):
+        self._unlink(key)
+
+    def victim(self):
+        """Return the key to evict next, or `None`."""
+        if not self._buckets:
+            return None
+        if self._min not in self._buckets:
+            self._min = min(self._buckets)
+        return next(iter(self._buckets[self._min]))
+
+
+class MemoryBudget:
+    """
+    A bound of *max_bytes* on the total size of the contents of files
+    kept in memory.
+
+    Set `.File.memory_budget` to this to limit the memory used by the
+    contents of all file resources. When loading the contents of a file
+    exceeds the budget, the contents of other files are evicted, as
+    chosen by *policy* (an `LRUPolicy` by default, or an `LFUPolicy`).
+    Evicted contents are read from disk again when they are next
+    needed.
+
+    Contents shared by several files through a `ContentStore` are
+    counted once, and evicting them evicts them from all of these
+    files, so their memory is actually freed.
+
+    Contents assigned to `.File.data` are not counted, as they can't be
+    read again.
+    """
+
+    def __init__(self, max_bytes, policy=None):
+        self.max_bytes = max_bytes
+        self.policy = LRUPolicy() if policy is None else policy
+        self._lock = threading.Lock()
+        # Keyed by weak references to the files, or to the
+        # `SharedContent` of files sharing their contents.
+        self._sizes = {}
+        # The files using each `SharedContent`
+        self._users = {}
+        self._dead = []
+        #: The total size of the contents counted.
+        self.size = 0
+        #: The number of times contents were evicted.
+        self.evictions = 0
+
+    def __len__(self):
+        """The number of different contents counted."""
+        return len(self._sizes)
+
+    def _remove(self, key):
+        self.size -= self._sizes.pop(key)
+        self.policy.remove(key)
+        users = self._users.pop(key, None)
+        if users is None:
+            return [key()]
+        return list(users)
+
+    def _removeDead(self):
+        # Forget the files that were garbage collected. The weak
+        # reference callbacks only record them, as they can run at any
+        # time, even while we hold the lock.
+        while self._dead:
+            key = self._dead.pop()
+            if key in self._sizes:
+                self._remove(key)
+
+    def add(self, file, size, content=None):
+        """
+        Count the contents of *file*, *size* bytes, evicting the
+        contents of other files to stay within the budget.
+
+        If the contents are the `SharedContent` *content*, they are
+        only counted once for all files using them.
+        """
+        key = weakref.ref(file if content is None else content,
+                          self._dead.append)
+        evicted = []
+        with self._lock:
+            self._removeDead()
+            users = self._users.get(key)
+            if users is not None:
+                users.add(file)
+                self.policy.touch(key)
+                return
+            self.size += size
+            # The file being loaded is needed now, so it is only added
+            # to the policy once the others were evicted.
+            while self.size > self.max_bytes:
+                victim = self.policy.victim()
+                if victim is None:
+                    break
+                evicted.extend(self._remove(victim))
+                self.evictions += 1
+            self._sizes[key] = size
+            if content is not None:
+                self._users[key] = weakref.WeakSet([file])
+            self.policy.add(key)
+        # Evicting doesn't take the locks of the files, so loading
+        # files in several threads can't deadlock.
+        for file in evicted:
+            if file is not None:
+                file._evict()
+
+    def touch(self, file, content=None):
+        """Record that the contents of *file* were used."""
+        key = weakref.ref(file if content is None else content)
+        with self._lock:
+            if key in self._sizes:
+                self.policy.touch(key)
+
+    def remove(self, file, content=None):
+        """Stop counting the contents of *file*."""
+        key = weakref.ref(file if content is None else content)
+        with self._lock:
+            if key not in self._sizes:
+                return
+            users = self._users.get(key)
+            if users is not None:
+                users.discard(file)
+                if users:
+                    # Other files still hold the contents.
+                    return
+            self._remove(key)
+
+
+def memoryReport(registry=None):
+    """
+    Return a mapping describing the memory used by the file resources
+    registered in *registry*, the global registry by default.
+
+    The mapping has the number of resource ``factories``, the number of
+    `.File` objects they use (``files``, including precompressed
+    variants and the files of the cached contents of resource
+    directories), the number of those with their contents in memory
+    (``resident_files``) and the total size of those contents
+    (``resident_bytes``). Objects and contents shared by several
+    resources are only counted once.
+    """
+    if registry is None:
+        registry = getGlobalSiteManager()
+    factories = {}
+    for registration in registry.registeredAdapters():
+        factory = registration.factory
+        if IResourceFactory.providedBy(factory):
+            factories[id(factory)] = factory
+
+    files = {}
+    for factory in factories.values():
+        todo = list(getattr(factory, 'files', list)())
+        while todo:
+            file = todo.pop()
+            if id(file) not in files:
+                files[id(file)] = file
+                todo.extend(file.variants.values())
+
+    resident_files = 0
+    contents = {}
+    for file in files.values():
+        data = file.resident_data
+        if data is not None:
+            resident_files += 1
+            contents[id(data)] = len(data)
+    return {
+        'factories': len(factories),
+        'files': len(files),
+        'resident_files': resident_files,
+        'resident_bytes': sum(contents.values()),
+    }
@@ -0,0 +1,179 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Several file resources combined in one response
+"""
+from email.utils import formatdate
+
+from zope.interface import implementer
+from zope.publisher.browser import BrowserView
+from zope.publisher.interfaces import NotFound
+from zope.publisher.interfaces.browser import IBrowserPublisher
+from zope.security.checker import ProxyFactory
+from zope.security.proxy import removeSecurityProxy
+from zope.traversing.namespace import SimpleHandler
+
+from zope.browserresource.cache import LRUCache
+from zope.browserresource.file import EmptyResult
+from zope.browserresource.file import File
+from zope.browserresource.file import parse_etag_set
+from zope.browserresource.file import quote_etag
+from zope.browserresource.file import setCacheControl
+from zope.browserresource.interfaces import IFileResource
+
+
+class ComboNamespace(SimpleHandler):
+    """
+    The ``++combo++`` namespace of `.Resources`, traversing to a
+    `ComboResource`.
+
+    Register it by including the ``combo.zcml`` file of this package.
+    """
+
+    def __init__(self, context, request=None):
+        super().__init__(context, request)
+        self.request = request
+
+    def traverse(self, name, ignored):
+        return ComboResource(self.context, self.request, name)
+
+
+@implementer(IBrowserPublisher)
+class ComboResource(BrowserView):
+    """
+    The contents of several file resources of the same content type,
+    concatenated in one response.
+
+    The context is the `.Resources` view the resources are looked up
+    in, and *names* are the names of the resources separated by
+    commas, as in ``@@/++combo++a.js,b.js,dir/c.js``. The slashes of
+    resources in resource directories separate path segments, which
+    are added to the names by `publishTraverse`.
+
+    Each resource is traversed to as if it was requested on its own,
+    so its security checker must allow it to be published.
+
+    To bound the memory used by a request, each resource may only be
+    named once, at most `max_parts` resources may be combined, their
+    total size is limited by `max_size`, and resources whose contents
+    are not `resident <.File.resident>` can't be combined.
+    """
+
+    #: The bytes put between the contents of the resources.
+    separator = b'\n'
+
+    #: The maximum number of resources combined in one response.
+    max_parts = 20
+
+    #: The maximum total size in bytes of the resources combined in
+    #: one response.
+    max_size = 1024 * 1024
+
+    cacheTimeout = 86400
+
+    #: The combined contents of resources, bounded by their total size
+    #: in bytes.
+    cache = LRUCache(8 * 1024 * 1024, weigh=len)
+
+    def __init__(self, context, request, names):
+        super().__init__(context, request)
+        self.names = names
+
+    def publishTraverse(self, request, name):
+        return self.__class__(self.context, request,
+                              self.names + '/' + name)
+
+    def browserDefault(self, request):
+        return getattr(self, request.method), ()
+
+    def GET(self):
+        data, content_type, lmt, etag = self._combine()
+        request = self.request
+        response = request.response
+        setCacheControl(response, self.cacheTimeout)
+        if etag:
+            etag = quote_etag(etag)
+            response.setHeader('ETag', etag)
+            header = request.getHeader('If-None-Match', None)
+            if header is not None:
+                tags = parse_etag_set(header)
+                if etag in tags or '*' in tags:
+                    response.setStatus(304)
+                    return b''
+        response.setHeader('Content-Type', content_type)
+        response.setHeader('Last-Modified', formatdate(lmt, usegmt=True))
+        return data
+
+    def HEAD(self):
+        data, content_type, lmt, etag = self._combine()
+        response = self.request.response
+        setCacheControl(response, self.cacheTimeout)
+        if etag:
+            response.setHeader('ETag', quote_etag(etag))
+        response.setHeader('Content-Type', content_type)
+        response.setHeader('Content-Length', str(len(data)))
+        response.setHeader('Last-Modified', formatdate(lmt, usegmt=True))
+        return EmptyResult()
+
+    def _parts(self):
+        # Traverse to the resources like the publisher would.
+        request = self.request
+        names = self.names.split(',')
+        if len(names) > self.max_parts:
+            raise NotFound(self, self.names)
+        if len(set(names)) != len(names):
+            raise NotFound(self, self.names)
+        parts = []
+        for name in names:
+            segments = name.split('/')
+            if not all(segments):
+                raise NotFound(self, name)
+            resource = self.context.publishTraverse(request, segments[0])
+            for segment in segments[1:]:
+                resource = ProxyFactory(resource).publishTraverse(
+                    request, segment)
+            if not IFileResource.providedBy(resource):
+                raise NotFound(self, name)
+            # Raises Unauthorized if the resource may not be published
+            ProxyFactory(resource).GET
+            parts.append(removeSecurityProxy(resource))
+        return parts
+
+    def _combine(self):
+        parts = self._parts()
+        files = [part.chooseContext() for part in parts]
+        content_type = files[0].content_type
+        for name, file in zip(self.names.split(','), files):
+            if file.content_type != content_type:
+                raise NotFound(self, name)
+            # Files that are streamed from disk are not read into memory
+            if not getattr(file, 'resident', True):
+                raise NotFound(self, name)
+        if sum(file.size for file in files) > self.max_size:
+            raise NotFound(self, self.names)
+
+        etags = [part._makeETag(file) for part, file in zip(parts, files)]
+        if all(etags):
+            hasher = File.digest_factory()
+            hasher.update('\0'.join(etags).encode('utf-8'))
+            etag = hasher.hexdigest()
+        else:
+            etag = None
+
+        lmt = max(file.lmt for file in files)
+        key = tuple(file.digest for file in files)
+        data = self.cache.get(key)
+        if data is None:
+            data = self.separator.join(file.data for file in files)
+            self.cache[key] = data
+        return data, content_type, lmt, etag
@@ -22,7 +22,9 @@ __name__ values which include a '/' separating the __name__ of the
 resource directory from the name of the file within the directory.
 """
 import fnmatch
+import functools
 import os
+import stat
 
 from zope.component import queryUtility
 from zope.interface import implementer
@@ -31,10 +33,13 @@ from zope.publisher.browser import BrowserView
 from zope.publisher.interfaces import NotFound
 from zope.publisher.interfaces.browser import IBrowserPublisher
 
+from zope.browserresource.cache import LRUCache
 from zope.browserresource.file import FileResourceFactory
 from zope.browserresource.interfaces import IResourceFactory
 from zope.browserresource.interfaces import IResourceFactoryFactory
 from zope.browserresource.resource import Resource
+from zope.browserresource.resource import checkFingerprint
+from zope.browserresource.resource import splitFingerprint
 
 
 _not_found = object()
@@ -43,15 +48,99 @@ _not_found = object()
 def empty():
     return ''
 
+
+def _forbidden(name, patterns):
+    return any(fnmatch.fnmatch(name, pat) for pat in patterns)
+
+
+def _weigh(entry):
+    return entry[3]
+
+
+def _residentSize(resource_factory):
+    # The number of bytes the files of a resource factory keep in
+    # memory. Subdirectories share the cache of their directory, so
+    # their files are counted where they are cached.
+    get_files = getattr(resource_factory, 'files', None)
+    if get_files is None or isinstance(
+            resource_factory, DirectoryResourceFactory):
+        return 0
+    size = 0
+    for file in get_files():
+        for f in (file, *file.variants.values()):
+            if f.resident:
+                size += f.size
+    return size
+
 # we only need this class as a context for DirectoryResource
 
 
 class Directory:
 
-    def __init__(self, path, checker, name):
+    # Instances only get a __dict__ when attributes other than these
+    # are set on them.
+    __slots__ = ('path', 'checker', '__name__', 'factories',
+                 'forbidden_names', 'index', '__dict__', '__weakref__')
+
+    def __init__(self, path, checker, name, cache_size=0, indexed=False,
+                 forbidden_names=(), factories=None):
         self.path = path
         self.checker = checker
         self.__name__ = name
+        if factories is None:
+            factories = LRUCache(cache_size, weigh=_weigh)
+        #: Resource factories already created for the contents of this
+        #: directory and its subdirectories, keyed by the name relative
+        #: to the directory and the resource name, and bounded by the
+        #: size of the files they keep in memory.
+        self.factories = factories
+        self.forbidden_names = forbidden_names
+        #: A mapping of the names in the directory to `DirectoryEntry`
+        #: objects, or `None` if the directory is not indexed.
+        self.index = None
+        if indexed:
+            self.refresh()
+
+    def refresh(self):
+        """
+        (Re-)build the :attr:`index` of the directory contents.
+        """
+        index = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        isdir = False
+                        signature = (st.st_mtime_ns, st.st_size)
+                    elif entry.is_dir():
+                        isdir = True
+                        signature = None
+                    else:
+                        continue
+                except OSError:
+                    continue
+                name = entry.name
+                forbidden = _forbidden(name, self.forbidden_names)
+                index[name] = DirectoryEntry(isdir, signature, forbidden)
+        self.index = index
+
+
+class DirectoryEntry:
+    """
+    Information about a file or directory contained in an indexed
+    `Directory`.
+    """
+
+    __slots__ = ('isdir', 'signature', 'forbidden', 'factory')
+
+    def __init__(self, isdir, signature, forbidden):
+        self.isdir = isdir
+        self.signature = signature
+        self.forbidden = forbidden
+        #: The resolved `.IResourceFactoryFactory`, filled in on first
+        #: access.
+        self.factory = None
 
 
 @implementer(IBrowserPublisher)
@@ -67,7 +156,11 @@ class DirectoryResource(BrowserView, Resource):
     #: specific factory has been registered.
     default_factory = FileResourceFactory
 
-    #: The resource factory to use for directories.
+    #: The resource factory to use for directories. For indexed
+    #: directories, it is called with an additional ``indexed=True``
+    #: keyword argument. It is also passed the cache of resource
+    #: factories of this directory as the ``factories`` keyword
+    #: argument, to share it.
     directory_factory = None  # this will be assigned later in the module
 
     #: A sequence of name patterns usable with `fnmatch.fnmatch`.
@@ -117,48 +210,167 @@ class DirectoryResource(BrowserView, Resource):
 
         When the *name* refers to a directory, we use :attr:`our
         directory factory <directory_factory>`.
-        """
 
-        for pat in self.forbidden_names:
-            if fnmatch.fnmatch(name, pat):
-                if default is _not_found:
-                    raise NotFound(None, name)
-                return default
+        The resource factories are cached on the directory (see
+        `DirectoryResourceFactory.cache_size`), so files are only read
+        again once their modification time or size changes.
 
-        path = self.context.path
-        filename = os.path.join(path, name)
-        isfile = os.path.isfile(filename)
-        isdir = os.path.isdir(filename)
+        If the directory is indexed (see `Directory.refresh`), the
+        names are looked up in the index instead of on the
+        filesystem, and changes to the directory are only noticed
+        after the index has been refreshed.
 
-        if not (isfile or isdir):
+        Names that can't be found but contain a matching fingerprint
+        (see `.FingerprintedAbsoluteURL`) are looked up without it.
+        """
+
+        if getattr(self.context, 'index', None) is None:
+            found = self._lookup(name)
+        else:
+            found = self._lookupIndex(name)
+
+        if found is None:
+            parts = splitFingerprint(name)
+            if parts is not None:
+                resource = checkFingerprint(self.get(parts[0], None),
+                                            parts[1])
+                if resource is not None:
+                    return resource
             if default is _not_found:
                 raise NotFound(None, name)
             return default
 
-        if isfile:
+        factory, signature = found
+        filename = os.path.join(self.context.path, name)
+        rname = self.__name__ + '/' + name
+        resource = self._getFactory(
+            name, factory, filename, rname, signature)(self.request)
+        resource.__parent__ = self
+        return resource
+
+    def _lookup(self, name):
+        for pat in self.forbidden_names:
+            if fnmatch.fnmatch(name, pat):
+                return None
+
+        filename = os.path.join(self.context.path, name)
+        try:
+            st = os.stat(filename)
+        except (OSError, ValueError):
+            return None
+
+        if stat.S_ISREG(st.st_mode):
             ext = os.path.splitext(os.path.normcase(name))[1][1:]
             factory = queryUtility(IResourceFactoryFactory, ext,
                                    self.default_factory)
+            # Files are reloaded whenever they change on disk.
+            return factory, (st.st_mtime_ns, st.st_size)
+        if stat.S_ISDIR(st.st_mode):
+            return self.directory_factory, None
+        return None
+
+    def _lookupIndex(self, name):
+        # The index is a snapshot of the directory, so we neither touch
+        # the filesystem nor look up utilities once an entry is resolved.
+        entry = self.context.index.get(name)
+        if entry is None or entry.forbidden:
+            return None
+
+        factory = entry.factory
+        if factory is None:
+            if entry.isdir:
+                factory = functools.partial(self.directory_factory,
+                                            indexed=True)
+            else:
+                ext = os.path.splitext(os.path.normcase(name))[1][1:]
+                factory = queryUtility(IResourceFactoryFactory, ext,
+                                       self.default_factory)
+            entry.factory = factory
+        return factory, entry.signature
+
+    def _getFactory(self, name, factory, filename, rname, signature):
+        # Creating a resource factory for a file reads the file, so we
+        # keep the factories for the directory contents around for as
+        # long as the file stays unchanged on disk.
+        checker = self.context.checker
+        cache = getattr(self.context, 'factories', None)
+        if cache is None:
+            return factory(filename, checker, rname)
+        key = (name, rname)
+        entry = cache.get(key)
+        if entry is not None and entry[:2] == (factory, signature):
+            return entry[2]
+        if signature is None:
+            # Subdirectories share our cache.
+            resource_factory = factory(filename, checker, rname,
+                                       factories=cache)
         else:
-            factory = self.directory_factory
-
-        rname = self.__name__ + '/' + name
-        resource = factory(filename, self.context.checker, rname)(self.request)
-        resource.__parent__ = self
-        return resource
+            resource_factory = factory(filename, checker, rname)
+        cache[key] = (factory, signature, resource_factory,
+                      _residentSize(resource_factory))
+        return resource_factory
 
 
 @implementer(IResourceFactory)
 @provider(IResourceFactoryFactory)
 class DirectoryResourceFactory:
 
+    __slots__ = ('__dir', '__checker', '__name', '__dict__', '__weakref__')
+
     factoryClass = DirectoryResource
 
-    def __init__(self, path, checker, name):
-        self.__dir = Directory(path, checker, name)
+    #: The maximum total size in bytes of the files kept in memory by
+    #: the resource factories for the contents of the directory and
+    #: its subdirectories that are kept around between requests. The
+    #: least recently used factories are discarded first. Zero
+    #: disables the cache.
+    cache_size = 1024 * 1024
+
+    def __init__(self, path, checker, name, indexed=False, factories=None):
+        self.__dir = Directory(path, checker, name, self.cache_size,
+                               indexed, self.factoryClass.forbidden_names,
+                               factories)
         self.__checker = checker
         self.__name = name
 
+    def refresh(self):
+        """
+        Re-read the contents of an indexed directory.
+
+        This has no effect if the directory is not indexed.
+        """
+        if self.__dir.index is not None:
+            self.__dir.refresh()
+
+    def paths(self):
+        """
+        Return the paths of all files in the directory and its
+        subdirectories, leaving out forbidden names.
+        """
+        directory = self.__dir
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(directory.path):
+            dirnames[:] = sorted(
+                name for name in dirnames
+                if not _forbidden(name, directory.forbidden_names))
+            paths.extend(
+                os.path.join(dirpath, name) for name in sorted(filenames)
+                if not _forbidden(name, directory.forbidden_names))
+        return paths
+
+    def files(self):
+        """
+        Return the `.File` objects of the resources created for the
+        contents of the directory and its subdirectories that are
+        currently cached.
+        """
+        files = []
+        for entry in self.__dir.factories.values():
+            get_files = getattr(entry[2], 'files', None)
+            if get_files is not None and entry[1] is not None:
+                files.extend(get_files())
+        return files
+
     def __call__(self, request):
         resource = self.factoryClass(self.__dir, request)
         resource.__Security_checker__ = self.__checker
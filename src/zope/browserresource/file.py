@@ -14,9 +14,18 @@
 """File-based browser resources.
 """
 
+import functools
+import hashlib
+import mimetypes
+import mmap
 import os
 import re
+import secrets
+import threading
 import time
+import types
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from email.utils import formatdate
 from email.utils import mktime_tz
 from email.utils import parsedate_tz
@@ -24,22 +33,35 @@ from email.utils import parsedate_tz
 from zope.component import adapter
 from zope.component import queryMultiAdapter
 from zope.contenttype import guess_content_type
+from zope.interface import alsoProvides
 from zope.interface import implementer
 from zope.interface import provider
 from zope.publisher.browser import BrowserView
 from zope.publisher.interfaces import NotFound
 from zope.publisher.interfaces.browser import IBrowserPublisher
 from zope.publisher.interfaces.browser import IBrowserRequest
+from zope.publisher.interfaces.http import IResult
 
+from zope.browserresource.cache import CompressedFile
+from zope.browserresource.cache import LRUCache
+from zope.browserresource.interfaces import IDeterministicETagFactory
 from zope.browserresource.interfaces import IETag
+from zope.browserresource.interfaces import IFileETag
+from zope.browserresource.interfaces import IFileMetadataCache
 from zope.browserresource.interfaces import IFileResource
 from zope.browserresource.interfaces import IResourceFactory
 from zope.browserresource.interfaces import IResourceFactoryFactory
+from zope.browserresource.resource import FINGERPRINT_LENGTH
 from zope.browserresource.resource import Resource
 
 
 ETAG_RX = re.compile(r'[*]|(?:W/)?"(?:[^"\\]|[\\].)*"')
 
+#: The ``(content coding, file name suffix)`` pairs of the usual
+#: precompressed copies of files; set `File.precompressed` to this to
+#: serve them.
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
 
 def parse_etags(value):
     r"""Parse a list of entity tags.
@@ -100,6 +122,197 @@ def etag_matches(etag, tags):
     return False
 
 
+# Clients send the same header values over and over again, so the
+# results of parsing the most recently used ones are cached.
+_etag_sets = LRUCache(512)
+_dates = LRUCache(512)
+_not_parsed = object()
+
+
+def parse_etag_set(value):
+    """Parse a list of entity tags into a `frozenset`.
+
+        >>> sorted(parse_etag_set(' "foo", W/"bar" , "foo"'))
+        ['"foo"', 'W/"bar"']
+    """
+    tags = _etag_sets.get(value)
+    if tags is None:
+        tags = _etag_sets[value] = frozenset(parse_etags(value))
+    return tags
+
+
+def parse_date(value):
+    """Parse an HTTP date into a timestamp.
+
+        >>> parse_date('Thu, 01 Jan 1970 00:20:34 GMT')
+        1234
+        >>> parse_date('Thu, 01 Jan 1970 00:20:34 GMT; length=10')
+        1234
+
+    Some proxies seem to send invalid date strings. If the date string
+    is not valid, we ignore it by returning `None` rather than raise an
+    error to be generally consistent with common servers such as Apache
+    (which can usually understand the screwy date string as a lucky
+    side effect of the way they parse it).
+
+        >>> parse_date('not a date') is None
+        True
+    """
+    date = _dates.get(value, _not_parsed)
+    if date is _not_parsed:
+        try:
+            date = int(mktime_tz(parsedate_tz(value.split(';')[0])))
+        except (ValueError, TypeError, OverflowError):
+            date = None
+        _dates[value] = date
+    return date
+
+
+def parse_range(value, size, max_ranges=None):
+    """Parse the value of a ``Range`` header for an entity of *size* bytes.
+
+    Returns a sorted list of ``(start, end)`` tuples, where *end* is
+    exclusive, for the satisfiable byte ranges:
+
+        >>> parse_range('bytes=0-499', 10000)
+        [(0, 500)]
+        >>> parse_range('bytes=500-', 10000)
+        [(500, 10000)]
+        >>> parse_range('bytes=-500', 10000)
+        [(9500, 10000)]
+        >>> parse_range('bytes=0-0, 9000-99999, 20000-', 10000)
+        [(0, 1), (9000, 10000)]
+
+    Overlapping and adjacent ranges are merged:
+
+        >>> parse_range('bytes=500-999, 0-99, 100-299, 150-199', 10000)
+        [(0, 300), (500, 1000)]
+
+    An empty list means that none of the ranges can be satisfied:
+
+        >>> parse_range('bytes=20000-', 10000)
+        []
+        >>> parse_range('bytes=-0', 10000)
+        []
+
+    Headers that can't be parsed are ignored by returning `None`:
+
+        >>> parse_range('bytes=500-100', 10000) is None
+        True
+        >>> parse_range('lines=1-2', 10000) is None
+        True
+        >>> parse_range('bytes=a-b', 10000) is None
+        True
+        >>> parse_range('bytes=500', 10000) is None
+        True
+        >>> parse_range('bytes=, ', 10000) is None
+        True
+
+    So are headers asking for more than *max_ranges* ranges, or for
+    more bytes in total than the entity has, which can only be used to
+    make the response larger than the entity:
+
+        >>> parse_range('bytes=0-0, 2-2, 4-4', 10000, max_ranges=2) is None
+        True
+        >>> parse_range('bytes=0-, 0-', 10000) is None
+        True
+
+    """
+    unit, sep, specs = value.partition('=')
+    if not sep or unit.strip().lower() != 'bytes':
+        return None
+    ranges = []
+    specs = [spec for spec in specs.split(',') if spec.strip()]
+    if not specs:
+        return None
+    if max_ranges is not None and len(specs) > max_ranges:
+        return None
+    for spec in specs:
+        first, sep, last = spec.partition('-')
+        first = first.strip()
+        last = last.strip()
+        if not sep or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # A suffix range: the last N bytes
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append((max(size - length, 0), size))
+            continue
+        start = int(first)
+        if last:
+            end = int(last) + 1
+            if end <= start:
+                return None
+        else:
+            end = size
+        if start < size:
+            ranges.append((start, min(end, size)))
+
+    if sum(end - start for start, end in ranges) > size:
+        return None
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def choose_encoding(value, codings):
+    """Choose the content coding to use for an ``Accept-Encoding`` *value*.
+
+    Returns the acceptable content coding from *codings* that the client
+    prefers, using the order of *codings* to break ties, or `None` if
+    none of the *codings* is acceptable.
+
+        >>> choose_encoding('gzip, deflate, br', ['br', 'gzip'])
+        'br'
+        >>> choose_encoding('gzip;q=1.0, br;q=0.5', ['br', 'gzip'])
+        'gzip'
+        >>> choose_encoding('*;q=0.1', ['br', 'gzip'])
+        'br'
+        >>> choose_encoding('br;q=0, *', ['br', 'gzip'])
+        'gzip'
+        >>> choose_encoding('gzip,, br', ['br', 'gzip'])
+        'br'
+        >>> choose_encoding('identity', ['br', 'gzip']) is None
+        True
+        >>> choose_encoding('GZIP;q=bad', ['gzip']) is None
+        True
+
+    """
+    accepted = {}
+    for item in value.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, q_value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(q_value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+
+    default = accepted.get('*', 0.0)
+    best = None
+    best_q = 0.0
+    for coding in codings:
+        q = accepted.get(coding, default)
+        if q > best_q:
+            best = coding
+            best_q = q
+    return best
+
+
 def quote_etag(etag):
     r"""Quote an etag value
 
@@ -117,24 +330,303 @@ def quote_etag(etag):
     return '"%s"' % etag.replace('\\', '\\\\').replace('"', '\\"')
 
 
+_no_variants = types.MappingProxyType({})
+
+
 class File:
     """
     An object representing a file on the filesystem.
 
     These are created by `FileResourceFactory` for use with
     `FileResource`.
+
+    Unless the file is *lazy*, its contents are read when the object is
+    created. Lazy files only look at the file's metadata and read the
+    contents the first time `data` (or a `content_type` that can't be
+    guessed from the file name) is needed.
+
+    Files larger than `stream_threshold` are never held in memory; they
+    are streamed from disk by `FileResource` instead.
+
+    Precompressed copies of the file that exist next to it (see
+    `precompressed`) or that are listed in the `metadata` of the file
+    are available as `variants`.
     """
 
-    def __init__(self, path, name):
+    # Instances only get a __dict__ when they override one of the class
+    # attributes configuring them.
+    __slots__ = (
+        'path', '__name__', 'size', 'lmt', 'lmh', 'variants', 'etags',
+        '_data', '_shared', '_content_type', '_digest', '_headers',
+        '_lock', '_cache', '__dict__', '__weakref__',
+    )
+
+    #: The default for the *lazy* argument. Set this to `True` to
+    #: defer reading all files until they are first requested.
+    lazy = False
+
+    #: The size in bytes above which the contents of a file are not
+    #: kept in memory. `None` keeps all files in memory.
+    stream_threshold = None
+
+    #: The default for the *precompressed* argument: a sequence of
+    #: ``(content coding, file name suffix)`` pairs for precompressed
+    #: copies of the file, in order of preference. No copies are looked
+    #: for by default; use `PRECOMPRESSED` for ``.br`` and ``.gz`` ones.
+    precompressed = ()
+
+    #: The function creating the :mod:`hashlib` object used to compute
+    #: the `digest` of files.
+    digest_factory = functools.partial(hashlib.blake2b, digest_size=16)
+
+    #: If not `None`, the modification time (a timestamp) used for all
+    #: files instead of the one on the filesystem. Setting this to a
+    #: value shared by all nodes of a cluster, like the release time,
+    #: makes the ``Last-Modified`` headers agree between them.
+    fixed_lmt = None
+
+    #: An `.IFileMetadataSource` providing the content type, digest
+    #: and compressed variants of files computed ahead of time, like a
+    #: `.Manifest`. Files it knows are not read until they are first
+    #: needed. If it is an `.IFileMetadataCache`, like a
+    #: `.MetadataCache`, the content types and digests computed for
+    #: other files are stored in it.
+    metadata = None
+
+    #: A `.ContentStore` sharing the contents of identical files
+    #: between `File` objects, or `None` to read the contents of each
+    #: file separately.
+    content_store = None
+
+    #: A `.MemoryBudget` limiting the total size of the contents of
+    #: files kept in memory, or `None` to keep the contents of all
+    #: `resident` files.
+    memory_budget = None
+
+    def __init__(self, path, name, lazy=None, precompressed=None):
         self.path = path
         self.__name__ = name
-        with open(path, 'rb') as f:
-            self.data = f.read()
-        self.content_type = guess_content_type(path, self.data)[0]
-
-        self.lmt = float(os.path.getmtime(path)) or time.time()
+        if lazy is not None:
+            self.lazy = lazy
+        if precompressed is not None:
+            self.precompressed = precompressed
+        self._data = None
+        self._shared = None
+        self._content_type = None
+        self._digest = None
+        self._headers = {}
+        #: The ETags computed for this file by adapters providing
+        #: `.IDeterministicETagFactory`.
+        self.etags = {}
+        self._lock = threading.Lock()
+
+        st = os.stat(path)
+        self.size = st.st_size
+        if self.fixed_lmt is not None:
+            self.lmt = float(self.fixed_lmt)
+        else:
+            self.lmt = float(st.st_mtime) or time.time()
         self.lmh = formatdate(self.lmt, usegmt=True)
 
+        metadata = None
+        self._cache = None
+        source = self.metadata
+        if source is not None:
+            metadata = source.lookup(path, st)
+            if IFileMetadataCache.providedBy(source):
+                self._cache = (source, st)
+        if metadata is not None:
+            self._content_type = metadata.get('content_type')
+            self._digest = metadata.get('digest')
+        if self.lazy or not self.resident or metadata is not None:
+            if self._content_type is None:
+                content_type = mimetypes.guess_type(path, strict=False)[0]
+                if content_type is not None:
+                    self._content_type = content_type.lower()
+        else:
+            self._load()
+
+        variants = {}
+        for coding, suffix in self.precompressed:
+            if os.path.isfile(path + suffix):
+                variants[coding] = self.__class__(
+                    path + suffix, name, self.lazy, precompressed=())
+        if metadata is not None:
+            for coding, variant in metadata.get('variants', {}).items():
+                if coding not in variants:
+                    variants[coding] = self.__class__(
+                        variant, name, True, precompressed=())
+        #: A mapping from content codings to `File` objects for the
+        #: precompressed copies of this file.
+        self.variants = variants or _no_variants
+
+    @property
+    def resident(self):
+        """Whether the contents are kept in memory once read."""
+        threshold = self.stream_threshold
+        return threshold is None or self.size <= threshold
+
+    def _read(self, size=-1):
+        with open(self.path, 'rb') as f:
+            return f.read(size)
+
+    def _load(self):
+        with self._lock:
+            data = self._data
+            if data is None:
+                store = self.content_store
+                if store is None:
+                    data = self._read()
+                else:
+                    # Keeps the shared contents alive while we use them
+                    shared = self._shared = store.load(
+                        self.path, self.digest_factory, self._digest)
+                    data = shared.data
+                    if self._digest is None:
+                        self._digest = shared.digest
+                        self._remember('digest', self._digest)
+                if self._content_type is None:
+                    self._content_type = guess_content_type(
+                        self.path, data)[0]
+                    self._remember('content_type', self._content_type)
+                self._data = data
+                if self.memory_budget is not None:
+                    # This may evict the contents of other files
+                    self.memory_budget.add(
+                        self, len(data), self._shared)
+            return data
+
+    def _evict(self):
+        # Called by the memory budget. The contents are read again when
+        # they are next needed.
+        self._data = None
+        self._shared = None
+
+    def _remember(self, key, value):
+        # Store computed metadata in the metadata cache.
+        if self._cache is not None:
+            cache, st = self._cache
+            cache.store(self.path, st, {key: value})
+
+    def map(self):
+        """
+        Return a read-only `mmap.mmap` of the file.
+
+        This gives access to the contents of files that are not
+        `resident` without reading them into memory.
+        """
+        with open(self.path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def data(self):
+        """
+        The contents of the file.
+
+        For files that are not `resident`, this reads the file each
+        time it is accessed.
+        """
+        data = self._data
+        if data is None:
+            if not self.resident:
+                return self._read()
+            data = self._load()
+        elif self.memory_budget is not None:
+            self.memory_budget.touch(self, self._shared)
+        return data
+
+    @data.setter
+    def data(self, value):
+        if self.memory_budget is not None:
+            self.memory_budget.remove(self, self._shared)
+        self._data = value
+        self._shared = None
+        # The contents no longer match the file on disk, so what is
+        # computed from them is not remembered in the metadata cache.
+        self._digest = None
+        self._cache = None
+        self._headers = {}
+        self.etags = {}
+
+    @property
+    def resident_data(self):
+        """
+        The contents of the file if they are held in memory, or `None`.
+
+        Unlike `data`, this never reads the file. Files sharing their
+        contents through a `.ContentStore` return the same object.
+        """
+        return self._data
+
+    @property
+    def digest(self):
+        """
+        The hexadecimal digest of the contents computed with
+        `digest_factory`.
+
+        This is computed when first accessed, reading the file in
+        chunks for files that are not `resident`.
+        """
+        digest = self._digest
+        if digest is None:
+            hasher = self.digest_factory()
+            if self.resident:
+                hasher.update(self.data)
+            else:
+                for chunk in FileResult(self.path, self.size):
+                    hasher.update(chunk)
+            digest = self._digest = hasher.hexdigest()
+            self._remember('digest', digest)
+        return digest
+
+    @property
+    def content_type(self):
+        """The content type of the file."""
+        content_type = self._content_type
+        if content_type is None:
+            if self.resident:
+                self._load()
+            else:
+                # The beginning of the file is enough for sniffing.
+                self._content_type = guess_content_type(
+                    self.path, self._read(8192))[0]
+                self._remember('content_type', self._content_type)
+            content_type = self._content_type
+        return content_type
+
+    @content_type.setter
+    def content_type(self, value):
+        self._content_type = value
+        self._headers = {}
+
+    def headers(self, coding=None, file=None):
+        """
+        Return the entity headers of a response sending this file, as
+        a tuple of ``(name, value)`` pairs.
+
+        If a content *coding* is given, the headers are for *file*, the
+        representation of this file with that coding (one of the
+        `variants` or a `.CompressedFile`).
+
+        The headers are computed the first time they are needed for a
+        coding and reused for all later responses.
+        """
+        headers = self._headers.get(coding)
+        if headers is None:
+            if file is None:
+                file = self
+            headers = [('Content-Type', self.content_type)]
+            if getattr(file, 'resident', True):
+                headers.append(('Content-Length', str(len(file.data))))
+            else:
+                headers.append(('Content-Length', str(file.size)))
+            headers.append(('Last-Modified', file.lmh))
+            headers.append(('Accept-Ranges', 'bytes'))
+            if coding is not None:
+                headers.append(('Content-Encoding', coding))
+            headers = self._headers[coding] = tuple(headers)
+        return headers
+
 
 @implementer(IFileResource, IBrowserPublisher)
 class FileResource(BrowserView, Resource):
@@ -147,6 +639,36 @@ class FileResource(BrowserView, Resource):
 
     cacheTimeout = 86400
 
+    #: The number of seconds fingerprinted resources may be cached.
+    immutableCacheTimeout = 31536000
+
+    #: Whether the resource was traversed to with a fingerprint in its
+    #: name (see `.FingerprintedAbsoluteURL`). The contents of such
+    #: resources are sent as immutable.
+    fingerprinted = False
+
+    #: A `.CompressionCache` used to compress responses for files
+    #: without precompressed variants, or `None` to send them as they
+    #: are.
+    compression_cache = None
+
+    #: An `Offload` leaving sending the contents of files to the
+    #: front-end web server, or `None` to send them from the
+    #: application.
+    offload = None
+
+    #: The maximum number of ranges in a ``Range`` header. Headers with
+    #: more ranges are ignored.
+    max_ranges = 50
+
+    #: The size in bytes from which the contents of `resident
+    #: <File.resident>` files are sent with the ``wsgi.file_wrapper``
+    #: of the WSGI server, which may send them with `os.sendfile`
+    #: without copying them. Files that are not resident are always
+    #: sent with it if the server has one. `None` sends resident files
+    #: from memory.
+    file_wrapper_threshold = None
+
     def publishTraverse(self, request, name):
         '''File resources can't be traversed further, so raise NotFound if
         someone tries to traverse it.
@@ -186,8 +708,8 @@ class FileResource(BrowserView, Resource):
           >>> request = TestRequest(REQUEST_METHOD='HEAD')
           >>> resource = factory(request)
           >>> view, next = resource.browserDefault(request)
-          >>> view() == b''
-          True
+          >>> list(view())
+          []
           >>> next == ()
           True
 
@@ -225,66 +747,169 @@ class FileResource(BrowserView, Resource):
 
         '''
 
-        file = self.chooseContext()
+        base, file, encoding, etag = self._chooseRepresentation()
         request = self.request
         response = request.response
+        if etag:
+            etag = quote_etag(etag)
 
-        etag = self._makeETag(file)
+        self._setCacheControl(response)
+
+        # 304 responses MUST contain ETag, if one would've been sent with
+        # a 200 response
+        if etag:
+            response.setHeader('ETag', etag)
+
+        if_modified_since = request.getHeader('If-Modified-Since', None)
+        if_none_match = request.getHeader('If-None-Match', None)
+        if (if_modified_since is not None or if_none_match is not None) \
+                and self._notModified(file, etag, if_modified_since,
+                                      if_none_match):
+            response.setStatus(304)
+            return b''
+
+        file, encoding, compressed_etag = self._compress(base, file, encoding)
+        if compressed_etag is not None:
+            etag = quote_etag(compressed_etag)
+            response.setHeader('ETag', etag)
 
-        setCacheControl(response, self.cacheTimeout)
+        # 304 responses SHOULD NOT or MUST NOT include other entity headers,
+        # depending on whether the conditional GET used a strong or a weak
+        # validator.  We only use strong validators, which makes it SHOULD
+        # NOT.
+        offload = self.offload
+        location = offload.location(file) if offload is not None else None
+        for name, value in self._entityHeaders(base, file, encoding):
+            if location is None or name != 'Content-Length':
+                response.setHeader(name, value)
+
+        if location is not None:
+            # The front-end server sends the file, answering range
+            # requests itself.
+            response.setHeader(offload.header, location)
+            return b''
+
+        header = request.getHeader('Range', None)
+        if header is not None and self._ifRange(file, etag):
+            result = self._rangeResult(file, header, base.content_type)
+            if result is not None:
+                return result
 
-        can_return_304 = False
-        all_cache_checks_passed = True
+        result = self._fileWrapper(file)
+        if result is not None:
+            return result
+
+        if not getattr(file, 'resident', True):
+            return FileResult(file.path, file.size)
+
+        if isinstance(file, CompressedFile):
+            self.compression_cache.sent(file)
+        return file.data
+
+    def _fileWrapper(self, file):
+        # Return the file wrapped in the wsgi.file_wrapper of the WSGI
+        # server, which zope.publisher hands to the server as the body,
+        # or None to send the file the usual way.
+        path = getattr(file, 'path', None)
+        if path is None:
+            return None
+        if getattr(file, 'resident', True):
+            threshold = self.file_wrapper_threshold
+            if threshold is None or file.size < threshold:
+                return None
+        file_wrapper = self.request.environment.get('wsgi.file_wrapper')
+        if file_wrapper is None:
+            return None
+        f = open(path, 'rb')
+        result = None
+        try:
+            # The headers were computed for the size we know.
+            if os.fstat(f.fileno()).st_size == file.size:
+                result = file_wrapper(f, FileResult.chunk_size)
+                alsoProvides(result, IResult)
+        except (AttributeError, TypeError):
+            # Wrappers that can't be marked as an IResult
+            result = None
+        finally:
+            if result is None:
+                f.close()
+        return result
+
+    def _notModified(self, file, etag, if_modified_since, if_none_match):
+        # Whether all conditional headers that were sent allow a 304
+        # response.
+
+        # HTTP If-None-Match header handling
+        if if_none_match is not None:
+            tags = parse_etag_set(if_none_match)
+            if not etag or (etag not in tags and '*' not in tags):
+                return False
 
         # HTTP If-Modified-Since header handling. This is duplicated
         # from OFS.Image.Image - it really should be consolidated
         # somewhere...
-        header = request.getHeader('If-Modified-Since', None)
-        if header is not None:
-            can_return_304 = True
-            header = header.split(';')[0]
-            # Some proxies seem to send invalid date strings for this
-            # header. If the date string is not valid, we ignore it
-            # rather than raise an error to be generally consistent
-            # with common servers such as Apache (which can usually
-            # understand the screwy date string as a lucky side effect
-            # of the way they parse it).
-            try:
-                mod_since = int(mktime_tz(parsedate_tz(header)))
-            except (ValueError, TypeError):
-                mod_since = None
+        if if_modified_since is not None:
+            mod_since = parse_date(if_modified_since)
             if getattr(file, 'lmt', None):
                 last_mod = int(file.lmt)
             else:
                 last_mod = 0
             if mod_since is None or last_mod <= 0 or last_mod > mod_since:
-                all_cache_checks_passed = False
+                return False
 
-        # HTTP If-None-Match header handling
-        header = request.getHeader('If-None-Match', None)
-        if header is not None:
-            can_return_304 = True
-            tags = parse_etags(header)
-            if not etag or not etag_matches(quote_etag(etag), tags):
-                all_cache_checks_passed = False
+        return True
 
-        # 304 responses MUST contain ETag, if one would've been sent with
-        # a 200 response
-        if etag:
-            response.setHeader('ETag', quote_etag(etag))
+    def _ifRange(self, file, etag):
+        # HTTP If-Range header handling: the Range header is only
+        # honored if the representation is unchanged. Only strong
+        # validators can match.
+        header = self.request.getHeader('If-Range', None)
+        if header is None:
+            return True
+        header = header.strip()
+        if header.startswith(('"', 'W/')):
+            return bool(etag) and header == etag
+        date = parse_date(header)
+        lmt = getattr(file, 'lmt', None)
+        return bool(lmt) and date is not None and int(lmt) == date
+
+    def _rangeResult(self, file, header, content_type):
+        # Return the body of a 206 or 416 response for the Range
+        # *header*, or None if the header should be ignored.
+        resident = getattr(file, 'resident', True)
+        if resident:
+            data = file.data
+            size = len(data)
+        else:
+            size = file.size
+
+        ranges = parse_range(header, size, self.max_ranges)
+        if ranges is None:
+            return None
 
-        if can_return_304 and all_cache_checks_passed:
-            response.setStatus(304)
+        response = self.request.response
+        if not ranges:
+            response.setStatus(416)
+            response.setHeader('Content-Range', 'bytes */%d' % size)
             return b''
 
-        # 304 responses SHOULD NOT or MUST NOT include other entity headers,
-        # depending on whether the conditional GET used a strong or a weak
-        # validator.  We only use strong validators, which makes it SHOULD
-        # NOT.
-        response.setHeader('Content-Type', file.content_type)
-        response.setHeader('Last-Modified', file.lmh)
-
-        return file.data
+        response.setStatus(206)
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            response.setHeader(
+                'Content-Range', 'bytes %d-%d/%d' % (start, end - 1, size))
+            response.setHeader('Content-Length', str(end - start))
+            if resident:
+                return data[start:end]
+            return FileResult(file.path, end - start, start)
+
+        boundary = secrets.token_hex(16)
+        result = ByteRangesResult(file, ranges, size, boundary,
+                                  content_type)
+        response.setHeader(
+            'Content-Type', 'multipart/byteranges; boundary=' + boundary)
+        response.setHeader('Content-Length', str(len(result)))
+        return result
 
     def HEAD(self):
         '''Return proper headers and no content for HEAD requests
@@ -296,27 +921,131 @@ class FileResource(BrowserView, Resource):
           ...     testFilePath, nullChecker, 'test.txt')
           >>> request = TestRequest()
           >>> resource = factory(request)
-          >>> resource.HEAD() == b''
-          True
+          >>> result = resource.HEAD()
+          >>> list(result)
+          []
+          >>> request.response.setResult(result)
           >>> request.response.getHeader('Content-Type') == 'text/plain'
           True
+          >>> request.response.getHeader('Content-Length')
+          '10'
 
         '''
-        file = self.chooseContext()
-        etag = self._makeETag(file)
+        base, file, encoding, etag = self._chooseRepresentation()
+        file, encoding, compressed_etag = self._compress(base, file, encoding)
+        if compressed_etag is not None:
+            etag = compressed_etag
         response = self.request.response
-        response.setHeader('Content-Type', file.content_type)
-        response.setHeader('Last-Modified', file.lmh)
+        for name, value in self._entityHeaders(base, file, encoding):
+            response.setHeader(name, value)
         if etag:
-            response.setHeader('ETag', etag)
-        setCacheControl(response, self.cacheTimeout)
-        return b''
+            response.setHeader('ETag', quote_etag(etag))
+        self._setCacheControl(response)
+        return EmptyResult()
+
+    @property
+    def fingerprint(self):
+        """
+        The fingerprint of the file contents used in the URLs produced
+        by `.FingerprintedAbsoluteURL`, or `None` if the file has no
+        `digest <File.digest>`.
+        """
+        digest = getattr(self.chooseContext(), 'digest', None)
+        if not digest:
+            return None
+        return digest[:FINGERPRINT_LENGTH]
+
+    def _entityHeaders(self, base, file, encoding):
+        headers = getattr(base, 'headers', None)
+        if headers is not None:
+            return headers(encoding, file)
+        # Contexts that aren't a `File` don't precompute their headers.
+        headers = [('Content-Type', base.content_type),
+                   ('Last-Modified', file.lmh),
+                   ('Accept-Ranges', 'bytes')]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        return headers
+
+    def _setCacheControl(self, response):
+        if self.fingerprinted:
+            setCacheControl(response, self.immutableCacheTimeout,
+                            immutable=True)
+        else:
+            setCacheControl(response, self.cacheTimeout)
+
+    def _chooseRepresentation(self):
+        # Choose the file to send, taking precompressed variants into
+        # account. Returns the chosen context, the file to send, its
+        # content coding (or None) and the ETag for the file. If the
+        # coding is to be produced by the compression cache, the file
+        # is the chosen context, and `_compress` compresses it once we
+        # know that a body is needed.
+        base = self.chooseContext()
+        file = base
+        encoding = None
+        variants = getattr(base, 'variants', None)
+        cache = self.compression_cache
+        if variants:
+            self.request.response.setHeader('Vary', 'Accept-Encoding')
+            header = self.request.getHeader('Accept-Encoding', None)
+            if header:
+                encoding = choose_encoding(header, variants)
+            if encoding is not None:
+                file = variants[encoding]
+        elif cache is not None and cache.compressible(base):
+            self.request.response.setHeader('Vary', 'Accept-Encoding')
+            header = self.request.getHeader('Accept-Encoding', None)
+            if header:
+                encoding = choose_encoding(header, cache.codings)
+
+        etag = self._makeETag(file)
+        if etag and encoding is not None:
+            # Each representation needs an ETag of its own
+            etag = f'{etag}-{encoding}'
+        return base, file, encoding, etag
+
+    def _compress(self, base, file, encoding):
+        # Compress the representation chosen by _chooseRepresentation
+        # with the compression cache, if needed. Returns the file to
+        # send, its content coding and a new ETag (or None if it
+        # didn't change) for contents that don't get smaller and are
+        # sent uncompressed.
+        if encoding is None or file is not base:
+            return file, encoding, None
+        compressed = self.compression_cache.compress(base, encoding)
+        if compressed is None:
+            return base, None, self._makeETag(base)
+        return compressed, encoding, None
 
     def _makeETag(self, file_):
+        # The adapter registry caches the lookup of the adapter factory
+        # and invalidates it when the registrations change.
         etag_adapter = queryMultiAdapter((self, self.request), IETag)
         if etag_adapter is None:
             return None
-        return etag_adapter(file_.lmt, file_.data)
+        etags = None
+        factory = type(etag_adapter)
+        if IDeterministicETagFactory.providedBy(factory):
+            etags = getattr(file_, 'etags', None)
+        if etags is not None:
+            key = (factory, file_.lmt)
+            try:
+                return etags[key]
+            except KeyError:
+                pass
+
+        if IFileETag.providedBy(etag_adapter):
+            etag = etag_adapter.fileETag(file_)
+        elif getattr(file_, 'resident', True):
+            etag = etag_adapter(file_.lmt, file_.data)
+        else:
+            with file_.map() as content:
+                etag = etag_adapter(file_.lmt, content)
+
+        if etags is not None:
+            etags[key] = etag
+        return etag
 
     # for unit tests
     def _testData(self):
@@ -326,6 +1055,7 @@ class FileResource(BrowserView, Resource):
 
 @adapter(IFileResource, IBrowserRequest)
 @implementer(IETag)
+@provider(IDeterministicETagFactory)
 class FileETag:
     """
     Default implementation of `.IETag`
@@ -341,11 +1071,213 @@ class FileETag:
         return f'{mtime}-{len(content)}'
 
 
-def setCacheControl(response, secs=86400):
+@implementer(IResult)
+class FileResult:
+    """
+    A :class:`zope.publisher.interfaces.http.IResult` that streams
+    *size* bytes of the file at *path*, starting at *offset*, in
+    chunks.
+
+    `FileResource` returns this for files that are not
+    `resident <File.resident>` if the WSGI server has no
+    ``wsgi.file_wrapper``.
+    """
+
+    #: The number of bytes read from the file at a time.
+    chunk_size = 65536
+
+    def __init__(self, path, size, offset=0):
+        self.path = path
+        self.size = size
+        self.offset = offset
+
+    def __iter__(self):
+        chunk_size = self.chunk_size
+        remaining = self.size
+        with open(self.path, 'rb') as f:
+            if self.offset:
+                f.seek(self.offset)
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+@implementer(IResult)
+class EmptyResult:
+    """
+    A :class:`zope.publisher.interfaces.http.IResult` with an empty
+    body.
+
+    `FileResource.HEAD` returns this, as for an empty `bytes` result
+    zope.publisher would replace the ``Content-Length`` header with 0.
+    """
+
+    def __iter__(self):
+        return iter(())
+
+
+@implementer(IResult)
+class ByteRangesResult:
+    """
+    A :class:`zope.publisher.interfaces.http.IResult` for a
+    ``multipart/byteranges`` response containing the *ranges* of
+    *file*.
+
+    The length of the object is the length of the response body.
+    """
+
+    def __init__(self, file, ranges, size, boundary, content_type=None):
+        if content_type is None:
+            content_type = file.content_type
+        self.parts = [
+            (('\r\n--%s\r\nContent-Type: %s\r\n'
+              'Content-Range: bytes %d-%d/%d\r\n\r\n'
+              % (boundary, content_type, start, end - 1, size)
+              ).encode('latin-1'), start, end)
+            for start, end in ranges
+        ]
+        self.trailer = ('\r\n--%s--\r\n' % boundary).encode('latin-1')
+        if getattr(file, 'resident', True):
+            self.data = file.data
+        else:
+            self.data = None
+            self.path = file.path
+
+    def __len__(self):
+        return len(self.trailer) + sum(len(header) + end - start
+                                       for header, start, end in self.parts)
+
+    def __iter__(self):
+        data = self.data
+        for header, start, end in self.parts:
+            yield header
+            if data is not None:
+                yield data[start:end]
+            else:
+                yield from FileResult(self.path, end - start, start)
+        yield self.trailer
+
+
+class Offload:
+    """
+    Leaves sending the contents of files to the front-end web server.
+
+    Set `FileResource.offload` to this to have `FileResource.GET` only
+    check permissions and compute the headers of responses, and send
+    the *header* naming the file to send instead of its contents. Use
+    ``X-Accel-Redirect`` for nginx and ``X-Sendfile`` for Apache's
+    mod_xsendfile or lighttpd.
+
+    *locations* maps directories, like those of resource directories,
+    to what the front-end server knows them as: the prefix of an
+    ``internal`` location for ``X-Accel-Redirect`` or the path of the
+    directory on the front-end server for ``X-Sendfile``. Files outside
+    of these directories are sent by the application as usual. For
+    ``X-Sendfile``, *locations* defaults to sending all files by their
+    own paths.
+
+    Responses for precompressed `variants <File.variants>` keep their
+    ``Content-Encoding`` header, which nginx only passes on if the
+    internal location adds it again from
+    ``$upstream_http_content_encoding``.
+    """
+
+    #: Files smaller than this many bytes are sent by the application.
+    min_size = 0
+
+    def __init__(self, header='X-Accel-Redirect', locations=None):
+        self.header = header
+        if locations is None:
+            locations = {os.sep: os.sep} if header == 'X-Sendfile' else {}
+        self.uri = header == 'X-Accel-Redirect'
+        # Longest directories first, so nested directories can be
+        # mapped differently.
+        self.locations = sorted(
+            ((os.path.join(os.path.abspath(directory), ''), target)
+             for directory, target in locations.items()),
+            key=lambda item: len(item[0]), reverse=True)
+
+    def location(self, file):
+        """
+        Return the value of the header for sending *file*, or `None` if
+        the application has to send it.
+        """
+        path = getattr(file, 'path', None)
+        if path is None or file.size < self.min_size:
+            return None
+        path = os.path.abspath(path)
+        for directory, target in self.locations:
+            if path.startswith(directory):
+                rest = path[len(directory):]
+                if self.uri:
+                    rest = urllib.parse.quote(rest.replace(os.sep, '/'))
+                    return target.rstrip('/') + '/' + rest
+                return os.path.join(target, rest)
+        return None
+
+
+@adapter(IFileResource, IBrowserRequest)
+@implementer(IFileETag)
+@provider(IDeterministicETagFactory)
+class DigestETag:
+    """
+    Implementation of `.IFileETag` using the `digest <File.digest>` of
+    the file contents.
+
+    Unlike `FileETag`, this doesn't depend on the modification time of
+    the file, so it is the same for identical files on different
+    machines. To use it instead of `FileETag`, include the
+    ``digest.zcml`` file of this package as an override. When
+    registering it yourself, register it as providing `.IETag`.
+    """
+
+    def __init__(self, context, request):
+        self.context = context
+        self.request = request
+
+    def __call__(self, mtime, content):
+        hasher = File.digest_factory()
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def fileETag(self, file):
+        digest = getattr(file, 'digest', None)
+        if digest is None:
+            return self(file.lmt, file.data)
+        return digest
+
+
+def compute_digests(files, max_workers=None):
+    """
+    Compute the `digest <File.digest>` of all *files* in a thread pool.
+
+    Call this at startup to avoid computing the digests during the
+    first requests.
+    """
+    with ThreadPoolExecutor(max_workers) as executor:
+        for _ in executor.map(lambda file: file.digest, files):
+            pass
+
+
+@functools.lru_cache(maxsize=16)
+def _cacheHeaders(secs, immutable, now):
+    # The headers only change once a second, so they are memoized
+    # by the current time in whole seconds.
+    if immutable:
+        cache_control = 'public,max-age=%s,immutable' % secs
+    else:
+        cache_control = 'public,max-age=%s' % secs
+    return (('Cache-Control', cache_control),
+            ('Expires', formatdate(now + secs, usegmt=True)))
+
+
+def setCacheControl(response, secs=86400, immutable=False):
     # Cache for one day by default
-    response.setHeader('Cache-Control', 'public,max-age=%s' % secs)
-    t = time.time() + secs
-    response.setHeader('Expires', formatdate(t, usegmt=True))
+    for name, value in _cacheHeaders(secs, immutable, int(time.time())):
+        response.setHeader(name, value)
 
 
 @implementer(IResourceFactory)
@@ -357,13 +1289,23 @@ class FileResourceFactory:
     The class itself provides `.IResourceFactoryFactory`
     """
 
+    __slots__ = ('__file', '__checker', '__name', '__dict__', '__weakref__')
+
     resourceClass = FileResource
 
-    def __init__(self, path, checker, name):
-        self.__file = File(path, name)
+    def __init__(self, path, checker, name, lazy=None):
+        self.__file = File(path, name, lazy)
         self.__checker = checker
         self.__name = name
 
+    def paths(self):
+        """Return the paths of the files of the resource."""
+        return [self.__file.path]
+
+    def files(self):
+        """Return the `File` objects of the resource."""
+        return [self.__file]
+
     def __call__(self, request):
         resource = self.resourceClass(self.__file, request)
         resource.__Security_checker__ = self.__checker
@@ -80,9 +80,19 @@ class I18nFileResource(FileResource):
 @provider(IResourceFactoryFactory)
 class I18nFileResourceFactory:
 
+    __slots__ = ('__data', '__defaultLanguage', '__dict__', '__weakref__')
+
     def __init__(self, data, defaultLanguage):
         self.__data = data
         self.__defaultLanguage = defaultLanguage
 
+    def paths(self):
+        """Return the paths of the files of all languages."""
+        return [file.path for file in self.__data.values()]
+
+    def files(self):
+        """Return the `.File` objects of all languages."""
+        return list(self.__data.values())
+
     def __call__(self, request):
         return I18nFileResource(self.__data, request, self.__defaultLanguage)
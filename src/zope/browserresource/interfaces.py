@@ -96,3 +96,94 @@ class IETag(Interface):
         :return: A string representing the ETag, or `None` to
             disable the ETag header.
         """
+
+
+class IFileETag(IETag):
+    """
+    An `IETag` that can compute the ETag from a `.File` directly.
+
+    `.FileResource` prefers `fileETag` over calling the adapter, which
+    allows implementations to use values computed only once per file.
+
+    .. seealso:: `zope.browserresource.file.DigestETag`
+    """
+
+    def fileETag(file):
+        """
+        Compute an ETag for the `.File` *file*.
+
+        :return: A string representing the ETag, or `None` to
+            disable the ETag header.
+        """
+
+
+class IDeterministicETagFactory(Interface):
+    """
+    Provided by `IETag` adapter classes whose ETags only depend on the
+    modification time and contents of the file.
+
+    `.FileResource` computes the ETags of such adapters only once per
+    `.File` and reuses them for later requests.
+
+    .. seealso:: `zope.browserresource.file.FileETag`
+    """
+
+
+class IResourceHosts(Interface):
+    """
+    A utility choosing the base URL of resource URLs, like a cookieless
+    static host or a CDN, instead of the URL of the current site.
+
+    .. seealso:: `zope.browserresource.resource.ResourceHosts`
+    """
+
+    def __call__(name):
+        """
+        Return the base URL for the resource named *name*.
+
+        The same name must always give the same base URL, so browsers
+        and caches see a single URL for each resource.
+        """
+
+
+class IFileMetadataSource(Interface):
+    """
+    Metadata of files computed ahead of time, used by `.File` instead
+    of reading and hashing the files when they are loaded.
+
+    .. seealso:: `zope.browserresource.manifest.Manifest`
+    """
+
+    def lookup(path, stat):
+        """
+        Return the metadata of the file at *path*, or `None` if it is
+        not known.
+
+        *stat* is the result of :func:`os.stat` for the file. Metadata
+        recorded for a different size or modification time of the file
+        is out of date and must not be returned.
+
+        The metadata is a mapping that may contain the keys
+        ``content_type`` and ``digest`` (see `.File.digest`), and
+        ``variants``, a mapping from content codings to the paths of
+        compressed copies of the file.
+        """
+
+
+class IFileMetadataCache(IFileMetadataSource):
+    """
+    An `IFileMetadataSource` that `.File` adds the metadata it computes
+    to, so it doesn't have to be computed again for unchanged files.
+
+    .. seealso:: `zope.browserresource.cache.MetadataCache`
+    """
+
+    def store(path, stat, metadata):
+        """
+        Remember the *metadata* of the file at *path* for the size and
+        modification time in *stat*.
+
+        *metadata* may contain only some of the keys described in
+        `IFileMetadataSource.lookup`; metadata stored earlier for the
+        same size and modification time is kept for the other keys.
+        """
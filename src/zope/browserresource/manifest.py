@@ -0,0 +1,261 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Metadata of file resources computed at build time
+
+The ``zope-browserresource-build`` script loads a ZCML configuration,
+collects the files of all resources it registers and writes their
+content types and digests, together with compressed copies of them, to
+a directory::
+
+    zope-browserresource-build etc/site.zcml var/resources
+
+To use the results, load the manifest before the configuration is
+executed. Files found in it are then neither read nor hashed on
+startup, and the compressed copies are served as their `variants
+<.File.variants>`::
+
+    File.metadata = Manifest.load('var/resources')
+
+Running the script again only processes the files that changed.
+"""
+import argparse
+import functools
+import gzip
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from zope.component import getGlobalSiteManager
+from zope.configuration import xmlconfig
+from zope.contenttype import guess_content_type
+from zope.interface import implementer
+
+from zope.browserresource.cache import is_compressible
+from zope.browserresource.file import PRECOMPRESSED
+from zope.browserresource.file import File
+from zope.browserresource.interfaces import IFileMetadataSource
+from zope.browserresource.interfaces import IResourceFactory
+
+
+#: The name of the manifest file in the output directory.
+MANIFEST = 'manifest.json'
+
+_VERSION = 1
+
+#: The content codings of the compressed copies written by `build`,
+#: mapped to the functions producing them, in order of preference.
+compressors = {}
+
+try:
+    import brotli
+except ModuleNotFoundError:  # pragma: no cover
+    pass
+else:  # pragma: no cover
+    compressors['br'] = functools.partial(brotli.compress, quality=11)
+
+compressors['gzip'] = functools.partial(
+    gzip.compress, compresslevel=9, mtime=0)
+
+
+@implementer(IFileMetadataSource)
+class Manifest:
+    """
+    The metadata of files written by `build` to *directory*.
+
+    ``files`` maps the paths of the files to dictionaries with their
+    ``size`` and ``mtime_ns`` when they were processed, their
+    ``content_type`` and ``digest``, and their ``variants``, a mapping
+    from content codings to the names of the compressed copies in
+    *directory*.
+    """
+
+    def __init__(self, directory, files=None):
+        self.directory = directory
+        self.files = {} if files is None else files
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Load the manifest written to *directory*.
+
+        The manifest is empty if none was written yet.
+        """
+        try:
+            with open(os.path.join(directory, MANIFEST),
+                      encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(directory)
+        if data.get('version') != _VERSION:
+            return cls(directory)
+        return cls(directory, data['files'])
+
+    def save(self):
+        """Write the manifest to its directory."""
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': _VERSION, 'files': self.files}, f,
+                      indent=1, sort_keys=True)
+        os.replace(path + '.tmp', path)
+
+    def _current(self, path, stat):
+        # The entry for path, if it is up to date.
+        entry = self.files.get(path)
+        if (entry is None
+                or entry['size'] != stat.st_size
+                or entry['mtime_ns'] != stat.st_mtime_ns):
+            return None
+        for name in entry['variants'].values():
+            if not os.path.isfile(os.path.join(self.directory, name)):
+                return None
+        return entry
+
+    def lookup(self, path, stat):
+        """See `.IFileMetadataSource`."""
+        entry = self._current(path, stat)
+        if entry is None:
+            return None
+        return {
+            'content_type': entry['content_type'],
+            'digest': entry['digest'],
+            'variants': {
+                coding: os.path.join(self.directory, name)
+                for coding, name in entry['variants'].items()},
+        }
+
+
+def _process(path, directory, digest_factory):
+    # Compute the manifest entry of a file in a worker process.
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    hasher = digest_factory()
+    hasher.update(data)
+    digest = hasher.hexdigest()
+    content_type = guess_content_type(path, data)[0]
+
+    variants = {}
+    if is_compressible(content_type):
+        suffixes = dict(PRECOMPRESSED)
+        for coding, compress in compressors.items():
+            # The copies are named for their contents, so identical
+            # files share them.
+            name = digest + suffixes.get(coding, '.' + coding)
+            target = os.path.join(directory, name)
+            if not os.path.isfile(target):
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    continue
+                with open(target + '.tmp%d' % os.getpid(), 'wb') as f:
+                    f.write(compressed)
+                os.replace(target + '.tmp%d' % os.getpid(), target)
+            variants[coding] = name
+
+    return {
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'content_type': content_type,
+        'digest': digest,
+        'variants': variants,
+    }
+
+
+def build(paths, directory, max_workers=None):
+    """
+    Compute the metadata and compressed copies of the files at *paths*
+    in a process pool, write them to *directory* and return the
+    `Manifest`.
+
+    Files with the same size and modification time as when the
+    manifest in *directory* was last written are not processed again,
+    and compressed copies no longer used are removed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = Manifest.load(directory)
+    manifest = Manifest(directory)
+    changed = []
+    for path in paths:
+        entry = previous._current(path, os.stat(path))
+        if entry is None:
+            changed.append(path)
+        else:
+            manifest.files[path] = entry
+
+    if changed:
+        with ProcessPoolExecutor(max_workers) as executor:
+            entries = executor.map(
+                _process, changed, itertools.repeat(directory),
+                itertools.repeat(File.digest_factory), chunksize=8)
+            manifest.files.update(zip(changed, entries))
+
+    used = {name for entry in manifest.files.values()
+            for name in entry['variants'].values()}
+    for entry in previous.files.values():
+        for name in entry['variants'].values():
+            if name not in used:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+                used.add(name)
+
+    manifest.save()
+    return manifest
+
+
+def resource_paths(registry=None):
+    """
+    Return the sorted paths of the files of all resources registered
+    in *registry*, the global registry by default.
+
+    These are the files of the resource factories with a ``paths``
+    method, like `.FileResourceFactory` and
+    `.DirectoryResourceFactory`.
+    """
+    if registry is None:
+        registry = getGlobalSiteManager()
+    paths = set()
+    for registration in registry.registeredAdapters():
+        factory = registration.factory
+        if (IResourceFactory.providedBy(factory)
+                and hasattr(factory, 'paths')):
+            paths.update(factory.paths())
+    return sorted(paths)
+
+
+def main(argv=None):
+    """The ``zope-browserresource-build`` script."""
+    parser = argparse.ArgumentParser(
+        description='Compute the metadata and compressed copies of'
+                    ' the files of browser resources.')
+    parser.add_argument(
+        'config', help='the ZCML file registering the resources')
+    parser.add_argument(
+        'directory', help='the directory to write the manifest to')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help='the number of processes (default: the number of CPUs)')
+    args = parser.parse_args(argv)
+
+    # Only the paths of the files are needed here.
+    lazy = File.lazy
+    File.lazy = True
+    try:
+        xmlconfig.file(os.path.abspath(args.config))
+    finally:
+        File.lazy = lazy
+    manifest = build(resource_paths(), args.directory, args.jobs)
+    print('Wrote the metadata of %d files to %s'
+          % (len(manifest.files), os.path.join(args.directory, MANIFEST)))
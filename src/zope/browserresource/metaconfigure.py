@@ -13,12 +13,15 @@
 ##############################################################################
 """ZCML directive handlers for browser resources
 """
+import itertools
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from zope.component import queryUtility
 from zope.component.interface import provideInterface
 from zope.component.zcml import handler
 from zope.configuration.exceptions import ConfigurationError
+from zope.configuration.exceptions import ConfigurationWrapperError
 from zope.interface import Interface
 from zope.interface import implementer
 from zope.interface import provider
@@ -36,6 +39,8 @@ from zope.browserresource.i18nfile import I18nFileResourceFactory
 from zope.browserresource.icon import IconViewFactory
 from zope.browserresource.interfaces import IResourceFactory
 from zope.browserresource.interfaces import IResourceFactoryFactory
+from zope.browserresource.interfaces import IResourceHosts
+from zope.browserresource.resource import ResourceHosts
 
 
 allowed_names = ('GET', 'HEAD', 'publishTraverse', 'browserDefault',
@@ -46,6 +51,9 @@ allowed_names = ('GET', 'HEAD', 'publishTraverse', 'browserDefault',
 @provider(IResourceFactoryFactory)
 class ResourceFactoryWrapper:
 
+    __slots__ = ('__factory', '__checker', '__name', '__dict__',
+                 '__weakref__')
+
     def __init__(self, factory, checker, name):
         self.__factory = factory
         self.__checker = checker
@@ -58,9 +66,85 @@ class ResourceFactoryWrapper:
         return resource
 
 
+class ResourceLoader:
+    """
+    Does the work of creating the resources of a configuration, like
+    reading and sniffing files, in a thread pool.
+
+    Directive handlers `add` the work while the configuration is
+    parsed. The first time a result is needed, usually when the first
+    resource is registered, all work added so far is done in parallel.
+    Use `resourceLoader` to get the loader of a configuration.
+    """
+
+    #: The maximum number of threads, or `None` for the default of
+    #: :class:`concurrent.futures.ThreadPoolExecutor`.
+    max_workers = None
+
+    def __init__(self):
+        self._pending = {}
+        self._results = {}
+        self._tokens = itertools.count()
+
+    def add(self, func, *args):
+        """
+        Add the work of calling *func* with *args* and return a token
+        to `get` its result with.
+        """
+        token = next(self._tokens)
+        self._pending[token] = (func, args)
+        return token
+
+    def load(self, tokens=None):
+        """Do the work added for *tokens*, or all work not done yet."""
+        if tokens is None:
+            tokens = list(self._pending)
+        work = [(token, self._pending.pop(token))
+                for token in tokens if token in self._pending]
+        if not work:
+            return
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            results = executor.map(_call, [item for _, item in work])
+            for (token, _), result in zip(work, results):
+                self._results[token] = result
+
+    def get(self, token):
+        """
+        Return the result of the work for *token* as a ``(result,
+        exception)`` pair, doing the work first if necessary.
+
+        Each result can only be gotten once.
+        """
+        if token in self._pending:
+            self.load()
+        return self._results.pop(token, (None, None))
+
+
+def _call(item):
+    func, args = item
+    try:
+        return func(*args), None
+    except Exception as e:
+        return None, e
+
+
+def resourceLoader(_context):
+    """
+    Return the `ResourceLoader` of the configuration *_context* belongs
+    to.
+    """
+    root = _context
+    while getattr(root, 'context', None) is not None:
+        root = root.context
+    loader = getattr(root, '_browserresource_loader', None)
+    if loader is None:
+        loader = root._browserresource_loader = ResourceLoader()
+    return loader
+
+
 def resource(_context, name, layer=IDefaultBrowserLayer,
              permission='zope.Public', factory=None,
-             file=None, image=None, template=None):
+             file=None, image=None, template=None, lazy=None):
 
     if permission == 'zope.Public':
         permission = CheckerPublic
@@ -88,27 +172,63 @@ def resource(_context, name, layer=IDefaultBrowserLayer,
         elif template:
             file = template
 
+    loader = token = None
+    if not factory:
+        loader = resourceLoader(_context)
+        token = loader.add(_preloadFileResource, file, checker, name, lazy)
+
     _context.action(
         discriminator=('resource', name, IBrowserRequest, layer),
         callable=resourceHandler,
-        args=(name, layer, checker, factory, file, _context.info),
+        args=(name, layer, checker, factory, file, _context.info, lazy,
+              loader, token),
     )
 
 
-def resourceHandler(name, layer, checker, factory, file, context_info):
+def _factoryFactory(file):
+    ext = os.path.splitext(os.path.normcase(file))[1][1:]
+    return queryUtility(IResourceFactoryFactory, ext, FileResourceFactory)
+
+
+def _makeFactory(factory_factory, file, checker, name, lazy):
+    if lazy is None:
+        return factory_factory(file, checker, name)
+    return factory_factory(file, checker, name, lazy=lazy)
+
+
+def _preloadFileResource(file, checker, name, lazy):
+    # Runs in the threads of a ResourceLoader. Only factories known to
+    # be thread-safe are created ahead of time.
+    factory_factory = _factoryFactory(file)
+    if not (isinstance(factory_factory, type)
+            and issubclass(factory_factory, FileResourceFactory)):
+        return None
+    return factory_factory, _makeFactory(
+        factory_factory, file, checker, name, lazy)
+
+
+def resourceHandler(name, layer, checker, factory, file, context_info,
+                    lazy=None, loader=None, token=None):
     if factory is not None:
         factory = ResourceFactoryWrapper(factory, checker, name)
     else:
-        ext = os.path.splitext(os.path.normcase(file))[1][1:]
-        factory_factory = queryUtility(IResourceFactoryFactory, ext,
-                                       FileResourceFactory)
-        factory = factory_factory(file, checker, name)
+        factory_factory = _factoryFactory(file)
+        preloaded = None
+        if loader is not None:
+            preloaded = loader.get(token)[0]
+        if preloaded is not None and preloaded[0] is factory_factory:
+            factory = preloaded[1]
+        else:
+            # Nothing was preloaded, loading failed (so we get the error
+            # here, with this action's info) or the factory changed.
+            factory = _makeFactory(factory_factory, file, checker, name,
+                                   lazy)
     handler('registerAdapter', factory, (layer,),
             Interface, name, context_info)
 
 
 def resourceDirectory(_context, name, directory, layer=IDefaultBrowserLayer,
-                      permission='zope.Public'):
+                      permission='zope.Public', indexed=False):
     if permission == 'zope.Public':
         permission = CheckerPublic
 
@@ -120,7 +240,7 @@ def resourceDirectory(_context, name, directory, layer=IDefaultBrowserLayer,
             "Directory %s does not exist" % directory
         )
 
-    factory = DirectoryResourceFactory(directory, checker, name)
+    factory = DirectoryResourceFactory(directory, checker, name, indexed)
     _context.action(
         discriminator=('resource', name, IBrowserRequest, layer),
         callable=handler,
@@ -179,19 +299,29 @@ def icon(_context, name, for_, file=None, resource=None,
     )
 
 
+def resourceHosts(_context, urls):
+    _context.action(
+        discriminator=('utility', IResourceHosts, ''),
+        callable=handler,
+        args=('registerUtility', ResourceHosts(*urls), IResourceHosts,
+              '', _context.info)
+    )
+
+
 class I18nResource:
 
     type = IBrowserRequest
     default_allowed_attributes = '__call__'
 
     def __init__(self, _context, name=None, defaultLanguage='en',
-                 layer=IDefaultBrowserLayer, permission=None):
+                 layer=IDefaultBrowserLayer, permission=None, lazy=None):
         self._context = _context
         self.name = name
         self.defaultLanguage = defaultLanguage
         self.layer = layer
         self.permission = permission
-        self.__data = {}
+        self.lazy = lazy
+        self.__files = {}
 
     def translation(self, _context, language, file=None, image=None):
 
@@ -216,20 +346,33 @@ class I18nResource:
                 _context.info.file, _context.info.line)
             file = image
 
-        self.__data[language] = File(_context.path(file), self.name)
+        self.__files[language] = (_context.path(file), _context.info)
 
     def __call__(self, require=None):
         if self.name is None:
             return
 
-        if self.defaultLanguage not in self.__data:
+        if self.defaultLanguage not in self.__files:
             raise ConfigurationError(
                 "A translation for the default language (%s) "
                 "must be specified" % self.defaultLanguage
             )
 
+        # Load the files of all translations in parallel
+        loader = resourceLoader(self._context)
+        tokens = {
+            language: loader.add(File, path, self.name, self.lazy)
+            for language, (path, info) in self.__files.items()}
+        loader.load(tokens.values())
+        data = {}
+        for language, token in tokens.items():
+            data[language], error = loader.get(token)
+            if error is not None:
+                info = self.__files[language][1]
+                raise ConfigurationWrapperError(info, error) from error
+
         permission = self.permission
-        factory = I18nFileResourceFactory(self.__data, self.defaultLanguage)
+        factory = I18nFileResourceFactory(data, self.defaultLanguage)
 
         if permission:
             if require is None:
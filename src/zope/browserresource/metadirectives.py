@@ -17,7 +17,10 @@ from zope.configuration.fields import GlobalInterface
 from zope.configuration.fields import GlobalObject
 from zope.configuration.fields import MessageID
 from zope.configuration.fields import Path
+from zope.configuration.fields import Tokens
 from zope.interface import Interface
+from zope.schema import URI
+from zope.schema import Bool
 from zope.schema import Int
 from zope.schema import TextLine
 from zope.security.zcml import Permission
@@ -95,6 +98,18 @@ class IResourceDirective(IBasicResourceInformation):
         required=False
     )
 
+    lazy = Bool(
+        title="Load the file lazily",
+        description="""
+        If true, the file is not read until the resource is first
+        requested. If not given, the default of
+        ``zope.browserresource.file.File.lazy`` is used.
+
+        This is only supported by resource factories that accept a
+        ``lazy`` argument, like the default file resource factory.""",
+        required=False
+    )
+
     template = Path(
         title="Template",
         description="""
@@ -133,6 +148,15 @@ class II18nResourceDirective(IBasicResourceInformation):
         required=False
     )
 
+    lazy = Bool(
+        title="Load the translations lazily",
+        description="""
+        If true, the translation files are not read until they are
+        first requested. If not given, the default of
+        ``zope.browserresource.file.File.lazy`` is used.""",
+        required=False
+    )
+
 
 class II18nResourceTranslationSubdirective(IBasicResourceInformation):
     """
@@ -189,6 +213,17 @@ class IResourceDirectoryDirective(IBasicResourceInformation):
         required=True
     )
 
+    indexed = Bool(
+        title="Index the directory contents",
+        description="""
+        If true, the contents of the directory are read once when the
+        directory is registered and names are looked up in that index
+        instead of on the filesystem. Files and directories added
+        later are not found until the index is refreshed.""",
+        required=False,
+        default=False
+    )
+
 
 class IIconDirective(Interface):
     """
@@ -252,3 +287,21 @@ class IIconDirective(Interface):
         required=False,
         default=16
     )
+
+
+class IResourceHostsDirective(Interface):
+    """
+    Serve resources from static hosts or a CDN instead of the site.
+
+    .. seealso:: `.ResourceHosts`
+    """
+
+    urls = Tokens(
+        title="The base URLs of the hosts",
+        description="""
+        Resource URLs are of the form ``<url>/@@/resourcename``, where
+        ``<url>`` is chosen from these URLs by the name of the
+        resource, so each resource always has the same URL.""",
+        value_type=URI(),
+        required=True
+    )
@@ -13,11 +13,15 @@
 ##############################################################################
 """Resource base class and AbsoluteURL adapter
 """
+import re
+import zlib
+
 import zope.component.hooks
 import zope.traversing.browser.absoluteurl
 from zope.component import adapter
 from zope.component import getMultiAdapter
 from zope.component import queryMultiAdapter
+from zope.component import queryUtility
 from zope.interface import implementer
 from zope.interface import implementer_only
 from zope.location import Location
@@ -25,6 +29,112 @@ from zope.publisher.interfaces.browser import IBrowserRequest
 from zope.traversing.browser.interfaces import IAbsoluteURL
 
 from zope.browserresource.interfaces import IResource
+from zope.browserresource.interfaces import IResourceHosts
+
+
+#: The key of the request annotation holding the site URLs computed
+#: by `AbsoluteURL`.
+_SITE_URLS = __name__ + '.site_urls'
+
+#: The number of hexadecimal digits of a file digest used as the
+#: fingerprint in resource URLs.
+FINGERPRINT_LENGTH = 12
+
+_fingerprint_rx = re.compile(
+    r'^(?P<stem>.+)\.(?P<fingerprint>[0-9a-f]{%d})(?P<ext>\.[^./]*)?$'
+    % FINGERPRINT_LENGTH)
+
+
+def addFingerprint(name, fingerprint):
+    """Add a *fingerprint* to the last segment of a resource *name*.
+
+        >>> addFingerprint('style.css', '0123456789ab')
+        'style.0123456789ab.css'
+        >>> addFingerprint('dir/jquery.min.js', '0123456789ab')
+        'dir/jquery.min.0123456789ab.js'
+        >>> addFingerprint('LICENSE', '0123456789ab')
+        'LICENSE.0123456789ab'
+        >>> addFingerprint('.htaccess', '0123456789ab')
+        '.htaccess.0123456789ab'
+
+    """
+    head, sep, last = name.rpartition('/')
+    stem, dot, ext = last.rpartition('.')
+    if stem:
+        last = f'{stem}.{fingerprint}.{ext}'
+    else:
+        last = f'{last}.{fingerprint}'
+    return head + sep + last
+
+
+def splitFingerprint(name):
+    """Split a name produced by `addFingerprint`.
+
+    Returns the original name and the fingerprint, or `None` if the
+    *name* doesn't contain a fingerprint.
+
+        >>> splitFingerprint('style.0123456789ab.css')
+        ('style.css', '0123456789ab')
+        >>> splitFingerprint('LICENSE.0123456789ab')
+        ('LICENSE', '0123456789ab')
+        >>> splitFingerprint('style.css') is None
+        True
+
+    """
+    match = _fingerprint_rx.match(name)
+    if match is None:
+        return None
+    return (match.group('stem') + (match.group('ext') or ''),
+            match.group('fingerprint'))
+
+
+def checkFingerprint(resource, fingerprint):
+    """
+    Return *resource* if its fingerprint is *fingerprint*, after
+    marking it as ``fingerprinted``, otherwise return `None`.
+    """
+    if resource is None or \
+            getattr(resource, 'fingerprint', None) != fingerprint:
+        return None
+    resource.fingerprinted = True
+    return resource
+
+
+@implementer(IResourceHosts)
+class ResourceHosts:
+    """
+    An `.IResourceHosts` utility spreading resources over the given
+    static host *urls*.
+
+    Each resource name is assigned to one of the hosts by its CRC-32
+    checksum, so it always gets the same URL:
+
+        >>> hosts = ResourceHosts('https://s1.example.com/',
+        ...                       'https://s2.example.com')
+        >>> hosts('style.css')
+        'https://s2.example.com'
+        >>> hosts('logo.png')
+        'https://s1.example.com'
+        >>> hosts('style.css')
+        'https://s2.example.com'
+
+    The hosts must serve the resources at the same paths as the site,
+    e.g. by using the site as the origin of a CDN.
+
+    This utility can be registered with the ``browser:resourceHosts``
+    directive (see `.IResourceHostsDirective`).
+    """
+
+    def __init__(self, *urls):
+        if not urls:
+            raise ValueError('At least one URL is required')
+        self.urls = tuple(url.rstrip('/') for url in urls)
+
+    def __call__(self, name):
+        urls = self.urls
+        if len(urls) == 1:
+            return urls[0]
+        return urls[zlib.crc32(name.encode('utf-8')) % len(urls)]
 
 
 @implementer(IResource)
@@ -64,6 +174,12 @@ class AbsoluteURL(zope.traversing.browser.absoluteurl.AbsoluteURL):
     be combined with the name of the resource to produce the final
     URL.
 
+    The URL of the site is computed only once per request and site and
+    kept in the annotations of the request.
+
+    If an `.IResourceHosts` utility is registered, it chooses the base
+    URL instead of the site, e.g. ``https://static.example.com/@@/name``.
+
     .. seealso:: `zope.browserresource.resources.Resources`
         For the unnamed view that the URLs we produce usually refer to.
     """
@@ -80,12 +196,52 @@ class AbsoluteURL(zope.traversing.browser.absoluteurl.AbsoluteURL):
         if name.startswith('++resource++'):
             name = name[12:]
 
+        hosts = queryUtility(IResourceHosts)
+        if hosts is not None:
+            return self._createUrl(hosts(name), name)
+        return self._createUrl(self._siteURL(), name)
+
+    def _siteURL(self):
+        # All resource URLs of a request are based on the URL of the
+        # same site, so it's only computed once per request and site.
         site = zope.component.hooks.getSite()
+        annotations = getattr(self.request, 'annotations', None)
+        if annotations is None:
+            return self._computeSiteURL(site)
+        cache = annotations.setdefault(_SITE_URLS, {})
+        cached = cache.get(id(site))
+        if cached is not None and cached[0] is site:
+            return cached[1]
+        url = self._computeSiteURL(site)
+        cache[id(site)] = (site, url)
+        return url
+
+    def _computeSiteURL(self, site):
         base = queryMultiAdapter((site, self.request), IAbsoluteURL,
                                  name="resource")
         if base is None:
-            url = str(getMultiAdapter((site, self.request), IAbsoluteURL))
-        else:
-            url = str(base)
+            return str(getMultiAdapter((site, self.request), IAbsoluteURL))
+        return str(base)
+
 
-        return self._createUrl(url, name)
+class FingerprintedAbsoluteURL(AbsoluteURL):
+    """
+    An `AbsoluteURL` that adds the fingerprint of the resource, if it
+    has one, to the last segment of the URL, e.g.
+    ``path/to/site/@@/style.0123456789ab.css``.
+
+    Resources have a fingerprint if they have a ``fingerprint``
+    attribute that isn't `None`, like `.FileResource`. Traversing to
+    such URLs marks the resource as fingerprinted, and file resources
+    are then cached by browsers without revalidation, as their URL
+    changes whenever their contents change.
+
+    To use this instead of `AbsoluteURL`, include the
+    ``fingerprint.zcml`` file of this package as an override.
+    """
+
+    def _createUrl(self, baseUrl, name):
+        fingerprint = getattr(self.context, 'fingerprint', None)
+        if fingerprint:
+            name = addFingerprint(name, fingerprint)
+        return super()._createUrl(baseUrl, name)
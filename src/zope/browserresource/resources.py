@@ -13,12 +13,54 @@
 ##############################################################################
 """Resource URL access
 """
-from zope.component import queryAdapter
+from zope.component import getSiteManager
+from zope.interface import Interface
 from zope.interface import implementer
+from zope.interface import providedBy
 from zope.location import locate
 from zope.publisher.browser import BrowserView
 from zope.publisher.interfaces import NotFound
 from zope.publisher.interfaces.browser import IBrowserPublisher
+from zope.traversing.browser.interfaces import IAbsoluteURL
+
+from zope.browserresource.cache import LRUCache
+from zope.browserresource.resource import Resource
+from zope.browserresource.resource import checkFingerprint
+from zope.browserresource.resource import splitFingerprint
+
+
+_registered = LRUCache(128)
+
+
+def _registeredFactories(request):
+    # Return a mapping of the names of all adapters on the request to
+    # their factories.
+    adapters = getSiteManager().adapters
+    provided = providedBy(request)
+    registered = adapters.lookupAll((provided,), Interface)
+    key = (adapters, provided)
+    cached = _registered.get(key)
+    if cached is None or cached[0] is not registered:
+        cached = _registered[key] = (registered, dict(registered))
+    return cached[1]
+
+
+def queryResource(request, name):
+    """
+    Return the default adapter on *request* named *name*, or `None`.
+
+    This is equivalent to ``queryAdapter(request, name=name)``, but
+    looks the adapter factory up in a mapping of all names registered
+    for the interfaces provided by the request. The mapping is built
+    from ``lookupAll`` of the adapter registry, which caches its result
+    until registrations change, so the mapping is only rebuilt then.
+    Looking up names that are not registered doesn't add entries to
+    any cache.
+    """
+    factory = _registeredFactories(request).get(name)
+    if factory is None:
+        return None
+    return factory(request)
 
 
 @implementer(IBrowserPublisher)
@@ -92,11 +134,41 @@ class Resources(BrowserView):
       True
       >>> resource()
       'http://localhost/testresource'
+
+    The URLs of many resources can be computed at once with `urls`:
+
+      >>> resources.urls(['test', 'test'])
+      ['http://localhost/testresource', 'http://localhost/testresource']
+      >>> resources.urls(['test', 'does-not-exist'])
+      Traceback (most recent call last):
+      ...
+      zope.publisher.interfaces.NotFound: Object: <zope.browserresource.resources.Resources object at 0x...>,
+                name: 'does-not-exist'
+
+    Resources with a ``fingerprint`` can also be traversed to with their
+    fingerprint added to the name. They are located with their original
+    name and marked as ``fingerprinted``.
+
+      >>> Resource.fingerprint = '0123456789ab'
+      >>> resource = resources.publishTraverse(request, 'test.0123456789ab')
+      >>> resource.__name__
+      'test'
+      >>> resource.fingerprinted
+      True
+
+    Fingerprints that don't match aren't found.
+
+      >>> resources.publishTraverse(request, 'test.ba9876543210')
+      Traceback (most recent call last):
+      ...
+      zope.publisher.interfaces.NotFound: Object: <zope.browserresource.resources.Resources object at 0x...>,
+                name: 'test.ba9876543210'
     """  # noqa: E501 line too long
 
     def publishTraverse(self, request, name):
         """
-        Query for the default adapter on *request* named *name* and return it.
+        Query for the default adapter on *request* named *name* and return it
+        (see `queryResource`).
 
         This is usually a `.IResource` as registered with
         `.IResourceDirective`.
@@ -104,17 +176,69 @@ class Resources(BrowserView):
         The resource object is `located <.locate>` beneath the context of this
         object with the given *name*.
 
+        If no adapter is found and the *name* contains a fingerprint
+        (see `.FingerprintedAbsoluteURL`), the resource named without
+        the fingerprint is returned if its fingerprint matches.
+
         :raises NotFound: If no adapter can be found.
 
         .. seealso:: `zope.publisher.interfaces.browser.IBrowserPublisher`
         """
-        resource = queryAdapter(request, name=name)
+        resource = queryResource(request, name)
         if resource is None:
-            raise NotFound(self, name)
+            parts = splitFingerprint(name)
+            if parts is not None:
+                resource = checkFingerprint(
+                    queryResource(request, parts[0]), parts[1])
+            if resource is None:
+                raise NotFound(self, name)
+            name = parts[0]
 
         locate(resource, self.context, name)
         return resource
 
+    def urls(self, names):
+        """
+        Return the URLs of the resources named *names* as a list of
+        strings.
+
+        This is equivalent to ``[self[name]() for name in names]``, but
+        looks up the names and the
+        :class:`~zope.traversing.browser.interfaces.IAbsoluteURL`
+        adapters of the resources only once per call.
+
+        :raises NotFound: If one of the *names* isn't a resource.
+        """
+        request = self.request
+        registered = _registeredFactories(request)
+        adapters = getSiteManager().adapters
+        request_provides = providedBy(request)
+        url_factories = {}
+        urls = []
+        for name in names:
+            factory = registered.get(name)
+            resource = None if factory is None else factory(request)
+            if resource is None:
+                raise NotFound(self, name)
+            locate(resource, self.context, name)
+
+            url = None
+            if type(resource).__call__ is Resource.__call__:
+                provided = providedBy(resource)
+                try:
+                    url_factory = url_factories[provided]
+                except KeyError:
+                    url_factory = url_factories[provided] = adapters.lookup(
+                        (provided, request_provides), IAbsoluteURL)
+                if url_factory is not None:
+                    url = url_factory(resource, request)
+            if url is None:
+                # Resources that compute their URLs themselves
+                urls.append(resource())
+            else:
+                urls.append(str(url))
+        return urls
+
     def browserDefault(self, request):
         """See zope.publisher.interfaces.browser.IBrowserPublisher interface"""
         return empty, ()
@@ -0,0 +1,474 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Tests for the resource caches
+"""
+import doctest
+import gc
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from zope.component import provideAdapter
+from zope.interface import Interface
+from zope.interface.verify import verifyObject
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces.browser import IBrowserRequest
+from zope.publisher.interfaces.browser import IDefaultBrowserLayer
+from zope.security.checker import NamesChecker
+from zope.testing import cleanup
+
+from zope.browserresource.cache import CompressionCache
+from zope.browserresource.cache import ContentStore
+from zope.browserresource.cache import LFUPolicy
+from zope.browserresource.cache import LRUCache
+from zope.browserresource.cache import MemoryBudget
+from zope.browserresource.cache import MetadataCache
+from zope.browserresource.cache import memoryReport
+from zope.browserresource.directory import DirectoryResourceFactory
+from zope.browserresource.file import File
+from zope.browserresource.file import FileResourceFactory
+from zope.browserresource.i18nfile import I18nFileResourceFactory
+from zope.browserresource.interfaces import IFileMetadataCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_pop_and_clear(self):
+        cache = LRUCache(3)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertIn('a', cache)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_get_refreshes_entry(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+        cache['c'] = 3
+        self.assertEqual(cache.keys(), ['a', 'c'])
+
+    def test_stats(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache.get('a')
+        cache.get('b')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_weigh(self):
+        cache = LRUCache(10, weigh=len)
+        cache['a'] = b'12345'
+        cache['a'] = b'123'
+        self.assertEqual(cache.size, 3)
+        cache['b'] = b'1234567'
+        self.assertEqual(cache.size, 10)
+        self.assertEqual(cache.pop('a'), b'123')
+        self.assertEqual(cache.size, 7)
+        cache['c'] = b'12345678901'
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+        cache['d'] = b'12'
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+
+
+class TestCompressionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _file(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return File(path, name)
+
+    def test_compressible(self):
+        cache = CompressionCache()
+        self.assertTrue(cache.compressible(self._file('a.css', b'a' * 2000)))
+        self.assertFalse(cache.compressible(self._file('b.css', b'a' * 20)))
+        self.assertFalse(cache.compressible(self._file('c.png', b'a' * 2000)))
+        large = self._file('d.css', b'a' * 2000)
+        large.stream_threshold = 100
+        self.assertFalse(cache.compressible(large))
+
+    def test_compress(self):
+        cache = CompressionCache()
+        file = self._file('a.css', b'a' * 2000)
+        compressed = cache.compress(file, 'gzip')
+        self.assertEqual(gzip.decompress(compressed.data), file.data)
+        self.assertEqual(compressed.lmh, file.lmh)
+        self.assertIs(cache.compress(file, 'gzip').data, compressed.data)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.size, len(compressed.data))
+        # Only compressed bodies that are sent count
+        self.assertEqual(cache.bytes_saved, 0)
+        cache.sent(compressed)
+        self.assertEqual(cache.bytes_saved,
+                         len(file.data) - len(compressed.data))
+
+    def test_compress_fixed_lmt(self):
+        # Changed contents are compressed again even if neither the
+        # modification time nor the size changes
+        File.fixed_lmt = 1
+        self.addCleanup(setattr, File, 'fixed_lmt', None)
+        cache = CompressionCache()
+        first = cache.compress(self._file('a.css', b'a' * 2000), 'gzip')
+        file = self._file('a.css', b'b' * 2000)
+        second = cache.compress(file, 'gzip')
+        self.assertEqual(gzip.decompress(second.data), file.data)
+        self.assertNotEqual(second.data, first.data)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_compress_incompressible(self):
+        cache = CompressionCache()
+        file = self._file('a.css', os.urandom(2000))
+        self.assertIsNone(cache.compress(file, 'gzip'))
+        self.assertEqual(cache.bytes_saved, 0)
+
+
+class TestMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.cache = MetadataCache(os.path.join(self.tmpdir, 'cache.db'))
+        self.addCleanup(self.cache.close)
+        self.addCleanup(setattr, File, 'metadata', None)
+        self.path = os.path.join(self.tmpdir, 'a.html')
+        with open(self.path, 'wb') as f:
+            f.write(b'<html><body>Hello</body></html>')
+
+    def test_interface(self):
+        verifyObject(IFileMetadataCache, self.cache)
+
+    def test_store_and_lookup(self):
+        st = os.stat(self.path)
+        self.assertIsNone(self.cache.lookup(self.path, st))
+        self.cache.store(self.path, st, {'content_type': 'text/html'})
+        self.cache.store(self.path, st, {'digest': 'abc'})
+        self.assertEqual(self.cache.lookup(self.path, st),
+                         {'content_type': 'text/html', 'digest': 'abc'})
+
+        # The metadata is kept in the database
+        cache = MetadataCache(self.cache.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.lookup(self.path, st)['digest'], 'abc')
+
+        # Metadata for other versions of the file isn't used or kept
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        changed = os.stat(self.path)
+        self.assertIsNone(self.cache.lookup(self.path, changed))
+        self.cache.store(self.path, changed, {'digest': 'def'})
+        self.assertEqual(self.cache.lookup(self.path, changed),
+                         {'digest': 'def'})
+        self.assertIsNone(self.cache.lookup(self.path, st))
+
+    def test_File(self):
+        File.metadata = self.cache
+        file = File(self.path, 'a.html')
+        self.assertEqual(file.content_type, 'text/html')
+        digest = file.digest
+        self.assertEqual(self.cache.lookup(self.path, os.stat(self.path)),
+                         {'content_type': 'text/html', 'digest': digest})
+
+        # Files known to the cache are neither read nor hashed
+        file = File(self.path, 'a.html')
+        self.assertIsNone(file._data)
+        self.assertEqual(file.content_type, 'text/html')
+        self.assertEqual(file.digest, digest)
+        self.assertIsNone(file._data)
+
+        # Assigned contents are not remembered for the file
+        file.data = b'changed'
+        self.assertNotEqual(file.digest, digest)
+        self.assertEqual(self.cache.lookup(self.path, os.stat(self.path)),
+                         {'content_type': 'text/html', 'digest': digest})
+
+    def test_File_sniffs_content_type_once(self):
+        File.metadata = self.cache
+        path = os.path.join(self.tmpdir, 'noext')
+        shutil.copy(self.path, path)
+        file = File(path, 'noext', lazy=True)
+        file.stream_threshold = 0
+        self.assertEqual(file.content_type, 'text/html')
+        self.assertEqual(self.cache.lookup(path, os.stat(path)),
+                         {'content_type': 'text/html'})
+
+
+class TestContentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.addCleanup(setattr, File, 'content_store', None)
+        self.store = ContentStore()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_load(self):
+        a = self._write('a.js', b'var a;')
+        b = self._write('b.js', b'var a;')
+        c = self._write('c.js', b'var c;')
+        content = self.store.load(a, File.digest_factory)
+        self.assertEqual(content.data, b'var a;')
+        self.assertEqual(content.digest, File(a, 'a.js').digest)
+        # Identical contents are shared
+        self.assertIs(self.store.load(b, File.digest_factory), content)
+        other = self.store.load(c, File.digest_factory)
+        self.assertIsNot(other, content)
+        self.assertEqual(self.store.report(), {
+            'contents': 2, 'size': 12, 'bytes_read': 18, 'bytes_saved': 6})
+
+    def test_load_same_file(self):
+        a = self._write('a.js', b'var a;')
+        link = os.path.join(self.tmpdir, 'link.js')
+        os.symlink(a, link)
+        content = self.store.load(a, File.digest_factory)
+        # The same file is not read again.
+        self.assertIs(self.store.load(link, File.digest_factory), content)
+        self.assertEqual(self.store.bytes_read, 6)
+        self.assertEqual(self.store.bytes_saved, 6)
+
+    def test_load_known_digest(self):
+        a = self._write('a.js', b'var a;')
+        content = self.store.load(a, File.digest_factory, 'known')
+        self.assertEqual(content.digest, 'known')
+
+    def test_unused_contents_are_discarded(self):
+        a = self._write('a.js', b'var a;')
+        content = self.store.load(a, File.digest_factory)
+        self.assertEqual(len(self.store), 1)
+        del content
+        gc.collect()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.size, 0)
+
+    def test_File(self):
+        File.content_store = self.store
+        a = File(self._write('a.js', b'var a;'), 'a.js')
+        b = File(self._write('b.js', b'var a;'), 'b.js')
+        self.assertIs(a.data, b.data)
+        self.assertEqual(a.digest, b.digest)
+        self.assertEqual(self.store.bytes_saved, 6)
+        # Changed contents are not shared
+        a.data = b'var b;'
+        self.assertEqual(b.data, b'var a;')
+
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.addCleanup(setattr, File, 'memory_budget', None)
+
+    def _file(self, name, data=b'1234'):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return File(path, name)
+
+    def test_lru(self):
+        budget = File.memory_budget = MemoryBudget(10)
+        a = self._file('a.txt')
+        b = self._file('b.txt')
+        self.assertEqual((budget.size, len(budget)), (8, 2))
+        a.data
+        c = self._file('c.txt')
+        self.assertIsNone(b._data)
+        self.assertIsNotNone(a._data)
+        self.assertEqual((budget.size, budget.evictions), (8, 1))
+
+        # Evicted files are read again when needed
+        self.assertEqual(b.data, b'1234')
+        self.assertIsNone(a._data)
+        self.assertIsNotNone(c._data)
+        self.assertEqual((budget.size, budget.evictions), (8, 2))
+
+    def test_lfu(self):
+        budget = File.memory_budget = MemoryBudget(10, LFUPolicy())
+        a = self._file('a.txt')
+        b = self._file('b.txt')
+        for i in range(3):
+            a.data
+        c = self._file('c.txt')
+        self.assertIsNone(b._data)
+        self.assertIsNotNone(a._data)
+        b.data
+        self.assertIsNotNone(a._data)
+        self.assertIsNone(c._data)
+        self.assertEqual(budget.evictions, 2)
+
+    def test_file_larger_than_budget(self):
+        budget = File.memory_budget = MemoryBudget(10)
+        a = self._file('a.txt')
+        large = self._file('large.txt', b'x' * 20)
+        self.assertIsNone(a._data)
+        self.assertEqual(large.data, b'x' * 20)
+        self.assertEqual(budget.size, 20)
+
+    def test_assigned_data_is_not_counted(self):
+        budget = File.memory_budget = MemoryBudget(10)
+        a = self._file('a.txt')
+        a.data = b'changed'
+        self.assertEqual((budget.size, len(budget)), (0, 0))
+        self._file('b.txt')
+        self._file('c.txt')
+        self._file('d.txt')
+        self.assertEqual(a.data, b'changed')
+
+    def test_collected_files_are_forgotten(self):
+        budget = File.memory_budget = MemoryBudget(10)
+        self._file('a.txt')
+        gc.collect()
+        b = self._file('b.txt')
+        self.assertEqual((budget.size, len(budget)), (4, 1))
+        budget.remove(b)
+        budget.remove(b)
+        budget.touch(b)
+        self.assertEqual(budget.size, 0)
+
+    def test_shared_contents(self):
+        budget = File.memory_budget = MemoryBudget(2500)
+        File.content_store = ContentStore()
+        self.addCleanup(setattr, File, 'content_store', None)
+        files = [self._file('%d.txt' % i, b'x' * 1000) for i in range(3)]
+        # The shared contents are only counted once
+        self.assertEqual((budget.size, len(budget), budget.evictions),
+                         (1000, 1, 0))
+        self.assertTrue(all(file._data is not None for file in files))
+
+        # Removing one of the files keeps the contents of the others
+        files[0].data = b'changed'
+        self.assertEqual((budget.size, len(budget)), (1000, 1))
+        files[1].data = b'changed'
+        files[2].data
+        self.assertEqual((budget.size, len(budget)), (1000, 1))
+
+        # Evicting shared contents evicts them from all files using
+        # them, which frees them
+        files += [self._file('y%d.txt' % i, b'y' * 1000) for i in range(2)]
+        self.assertEqual((budget.size, len(budget)), (2000, 2))
+        files.append(self._file('z.txt', b'z' * 1000))
+        self.assertEqual((budget.size, budget.evictions), (2000, 1))
+        self.assertIsNone(files[2]._data)
+        self.assertEqual(len(File.content_store), 2)
+        self.assertEqual(files[2].data, b'x' * 1000)
+        self.assertEqual([file._data for file in files[3:5]], [None, None])
+
+        # Contents are no longer counted once no file uses them
+        files[2].data = b'changed'
+        self.assertEqual((budget.size, len(budget)), (1000, 1))
+
+    def test_threads(self):
+        budget = File.memory_budget = MemoryBudget(100)
+        files = [self._file('%d.txt' % i, b'%-20d' % i) for i in range(20)]
+
+        def read():
+            for i in range(50):
+                for i, file in enumerate(files):
+                    self.assertEqual(file.data, b'%-20d' % i)
+
+        threads = [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(budget.size, 100)
+        self.assertEqual(budget.size,
+                         sum(20 for file in files if file._data is not None))
+
+
+class TestLFUPolicy(unittest.TestCase):
+
+    def test_victim(self):
+        policy = LFUPolicy()
+        self.assertIsNone(policy.victim())
+        policy.add('a')
+        policy.add('b')
+        policy.touch('a')
+        self.assertEqual(policy.victim(), 'b')
+        policy.remove('b')
+        self.assertEqual(policy.victim(), 'a')
+        policy.add('c')
+        policy.touch('c')
+        policy.touch('c')
+        policy.remove('a')
+        self.assertEqual(policy.victim(), 'c')
+
+
+class TestMemoryReport(cleanup.CleanUp, unittest.TestCase):
+
+    def test_memoryReport(self):
+        self.assertEqual(memoryReport(), {
+            'factories': 0, 'files': 0,
+            'resident_files': 0, 'resident_bytes': 0})
+
+        checker = NamesChecker()
+        testfiles = os.path.join(os.path.dirname(__file__), 'testfiles')
+        text = os.path.join(testfiles, 'test.txt')
+        factory = FileResourceFactory(text, checker, 'test.txt')
+        # Registering a factory for several layers doesn't count twice.
+        provideAdapter(factory, (IDefaultBrowserLayer,), Interface, 'a')
+        provideAdapter(factory, (IBrowserRequest,), Interface, 'a')
+        provideAdapter(FileResourceFactory(
+            os.path.join(testfiles, 'test.html'), checker, 'test.html',
+            lazy=True), (IDefaultBrowserLayer,), Interface, 'b')
+        directory = DirectoryResourceFactory(testfiles, checker, 'files')
+        provideAdapter(directory, (IDefaultBrowserLayer,), Interface, 'c')
+        # Files shared by several factories are only counted once
+        provideAdapter(I18nFileResourceFactory(
+            {'en': factory._FileResourceFactory__file}, 'en'),
+            (IDefaultBrowserLayer,), Interface, 'd')
+        provideAdapter(lambda request: None,
+                       (IDefaultBrowserLayer,), Interface, 'other')
+
+        self.assertEqual(memoryReport(), {
+            'factories': 4, 'files': 2,
+            'resident_files': 1, 'resident_bytes': os.path.getsize(text)})
+
+        # The files of the cached contents of directories are included
+        directory(TestRequest())['test.txt']
+        self.assertEqual(memoryReport()['files'], 3)
+        self.assertEqual(memoryReport()['resident_files'], 2)
+
+        # Shared contents are counted once
+        File.content_store = ContentStore()
+        self.addCleanup(setattr, File, 'content_store', None)
+        provideAdapter(FileResourceFactory(text, checker, 'copy.txt'),
+                       (IDefaultBrowserLayer,), Interface, 'e')
+        provideAdapter(FileResourceFactory(text, checker, 'copy2.txt'),
+                       (IDefaultBrowserLayer,), Interface, 'f')
+        report = memoryReport()
+        self.assertEqual(report['resident_files'], 4)
+        self.assertEqual(report['resident_bytes'], 3 * os.path.getsize(text))
+
+
+def test_suite():
+    return unittest.TestSuite((
+        unittest.defaultTestLoader.loadTestsFromName(__name__),
+        doctest.DocTestSuite('zope.browserresource.cache'),
+    ))
@@ -0,0 +1,198 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Combined resource tests.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import zope.security.management
+from zope.component import provideAdapter
+from zope.configuration.xmlconfig import XMLConfig
+from zope.interface import Interface
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces import NotFound
+from zope.publisher.interfaces.browser import IDefaultBrowserLayer
+from zope.security.checker import CheckerPublic
+from zope.security.checker import NamesChecker
+from zope.security.interfaces import Unauthorized
+from zope.testing import cleanup
+from zope.traversing.namespace import namespaceLookup
+
+import zope.browserresource
+from zope.browserresource.combo import ComboResource
+from zope.browserresource.directory import DirectoryResourceFactory
+from zope.browserresource.file import File
+from zope.browserresource.file import FileETag
+from zope.browserresource.file import FileResourceFactory
+from zope.browserresource.metaconfigure import allowed_names
+from zope.browserresource.resources import Resources
+
+
+testfiles = os.path.join(os.path.dirname(__file__), 'testfiles')
+
+
+class Participation:
+    interaction = None
+
+    def __init__(self, principal):
+        self.principal = principal
+
+
+class TestCombo(cleanup.CleanUp, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        XMLConfig('meta.zcml', zope.component)()
+        XMLConfig('meta.zcml', zope.security)()
+        XMLConfig('combo.zcml', zope.browserresource)()
+        provideAdapter(FileETag)
+        checker = NamesChecker(allowed_names, CheckerPublic)
+        for name in ('test.txt', 'test.html', 'test2.html'):
+            self._register(name, FileResourceFactory(
+                os.path.join(testfiles, name), checker, name))
+        self._register('files', DirectoryResourceFactory(
+            testfiles, checker, 'files'))
+        self.request = TestRequest()
+        self.resources = Resources(object(), self.request)
+        ComboResource.cache.clear()
+
+    def _register(self, name, factory):
+        provideAdapter(factory, (IDefaultBrowserLayer,), Interface, name)
+
+    def _combo(self, names):
+        return namespaceLookup('combo', names, self.resources, self.request)
+
+    def _read(self, name):
+        with open(os.path.join(testfiles, name), 'rb') as f:
+            return f.read()
+
+    def test_GET(self):
+        combo = self._combo('test.html,test2.html')
+        self.assertIsInstance(combo, ComboResource)
+        self.assertEqual(
+            combo.GET(),
+            self._read('test.html') + b'\n' + self._read('test2.html'))
+        response = self.request.response
+        self.assertEqual(response.getHeader('Content-Type'), 'text/html')
+        self.assertTrue(response.getHeader('ETag'))
+        self.assertTrue(response.getHeader('Last-Modified'))
+        self.assertEqual(len(ComboResource.cache), 1)
+
+        # The ETag depends on the parts
+        request = TestRequest()
+        self.resources.request = request
+        combo = namespaceLookup('combo', 'test2.html,test.html',
+                                self.resources, request)
+        request.response.setResult(combo.HEAD())
+        self.assertEqual(request.response.consumeBody(), b'')
+        self.assertEqual(
+            request.response.getHeader('Content-Length'),
+            str(len(self._read('test.html') + self._read('test2.html')) + 1))
+        self.assertNotEqual(request.response.getHeader('ETag'),
+                            response.getHeader('ETag'))
+
+    def test_GET_fixed_lmt(self):
+        # Changed contents are combined again even if neither the
+        # modification time nor the size changes
+        File.fixed_lmt = 1
+        self.addCleanup(setattr, File, 'fixed_lmt', None)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'a.txt')
+        checker = NamesChecker(allowed_names, CheckerPublic)
+        for data in (b'first', b'other'):
+            with open(path, 'wb') as f:
+                f.write(data)
+            self._register('a.txt', FileResourceFactory(
+                path, checker, 'a.txt'))
+            self.assertEqual(self._combo('a.txt,test.txt').GET(),
+                             data + b'\n' + self._read('test.txt'))
+        self.assertEqual(len(ComboResource.cache), 2)
+
+    def test_GET_not_modified(self):
+        self._combo('test.html,test2.html').GET()
+        etag = self.request.response.getHeader('ETag')
+        request = TestRequest(HTTP_IF_NONE_MATCH=etag)
+        resources = Resources(object(), request)
+        combo = namespaceLookup('combo', 'test.html,test2.html',
+                                resources, request)
+        self.assertEqual(combo.GET(), b'')
+        self.assertEqual(request.response.getStatus(), 304)
+
+    def test_GET_directory(self):
+        combo = self._combo('files').publishTraverse(self.request, 'test.txt')
+        view, path = combo.browserDefault(TestRequest())
+        self.assertEqual(path, ())
+        self.assertEqual(combo.GET(), self._read('test.txt'))
+
+    def test_GET_not_found(self):
+        self.assertRaises(NotFound, self._combo('test.html,nothere').GET)
+        self.assertRaises(NotFound, self._combo('test.html,,').GET)
+        self.assertRaises(NotFound, self._combo('test.html,').GET)
+        # Directories are not files
+        self.assertRaises(NotFound, self._combo('files').GET)
+        # Parts must have the same content type
+        self.assertRaises(NotFound, self._combo('test.html,test.txt').GET)
+
+    def test_GET_limits(self):
+        # Each resource may only be combined once
+        self.assertRaises(NotFound, self._combo('test.html,test.html').GET)
+        self.assertRaises(
+            NotFound, self._combo('test.html,test2.html,test.html').GET)
+
+        combo = self._combo('test.html,test2.html')
+        combo.max_parts = 1
+        self.assertRaises(NotFound, combo.GET)
+        combo = self._combo('test.html')
+        combo.max_parts = 1
+        self.assertTrue(combo.GET())
+
+        # The total size is checked before reading the files
+        size = sum(len(self._read(name))
+                   for name in ('test.html', 'test2.html'))
+        combo = self._combo('test.html,test2.html')
+        combo.max_size = size
+        self.assertTrue(combo.GET())
+        combo.max_size = size - 1
+        self.assertRaises(NotFound, combo.GET)
+
+    def test_GET_not_resident(self):
+        factory = FileResourceFactory(
+            os.path.join(testfiles, 'test.html'),
+            NamesChecker(allowed_names, CheckerPublic), 'large.html')
+        file = factory._FileResourceFactory__file  # get mangled file
+        file.stream_threshold = 0
+        self._register('large.html', factory)
+        self.assertRaises(NotFound, self._combo('large.html,test2.html').GET)
+        self.assertEqual(len(ComboResource.cache), 0)
+
+    def test_GET_checks_permissions(self):
+        self._register('secret.txt', FileResourceFactory(
+            os.path.join(testfiles, 'test.txt'),
+            NamesChecker(allowed_names, 'zope.ManageContent'),
+            'secret.txt'))
+        zope.security.management.newInteraction(Participation('bob'))
+        try:
+            self.assertEqual(self._combo('test.txt').GET(),
+                             self._read('test.txt'))
+            self.assertRaises(Unauthorized,
+                              self._combo('test.txt,secret.txt').GET)
+        finally:
+            zope.security.management.endInteraction()
+
+
+def test_suite():
+    return unittest.defaultTestLoader.loadTestsFromName(__name__)
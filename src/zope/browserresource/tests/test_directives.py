@@ -15,6 +15,7 @@
 """
 
 import os
+import threading
 import unittest
 from io import StringIO
 
@@ -37,7 +38,9 @@ import zope.browserresource
 from zope import component
 from zope.browserresource.directory import DirectoryResource
 from zope.browserresource.file import FileResource
+from zope.browserresource.file import FileResourceFactory
 from zope.browserresource.i18nfile import I18nFileResource
+from zope.browserresource.interfaces import IResourceHosts
 from zope.browserresource.metaconfigure import I18nResource
 from zope.browserresource.metaconfigure import resource
 
@@ -72,6 +75,15 @@ class ITestSkin(ITestLayer):
     """Test Skin."""
 
 
+class ThreadRecordingFactory(FileResourceFactory):
+
+    threads = []
+
+    def __init__(self, path, checker, name):
+        self.threads.append(threading.current_thread())
+        super().__init__(path, checker, name)
+
+
 class MyResource:
 
     def __init__(self, request):
@@ -176,6 +188,108 @@ class TestZCML(cleanup.CleanUp, unittest.TestCase):
         with open(path, 'rb') as f:
             self.assertEqual(unwrapped_r._testData(), f.read())
 
+    def testLazyFile(self):
+        path = os.path.join(tests_path, 'testfiles', 'test.html')
+        xmlconfig(StringIO(
+            template %
+            '''
+            <browser:resource
+                name="index.html"
+                file="%s"
+                lazy="true"
+                />
+            ''' % path
+        ))
+
+        r = component.getAdapter(self.request, name='index.html')
+        self.assertIsNone(r.context._data)
+        with open(path, 'rb') as f:
+            self.assertEqual(r.context.data, f.read())
+
+    def testFilesLoadedInThreads(self):
+        from zope.browserresource.interfaces import IResourceFactoryFactory
+        component.provideUtility(ThreadRecordingFactory,
+                                 IResourceFactoryFactory, name='html')
+        ThreadRecordingFactory.threads = []
+        path = os.path.join(tests_path, 'testfiles', 'test.html')
+        xmlconfig(StringIO(template % ''.join(
+            '<browser:resource name="%d.html" file="%s" />' % (i, path)
+            for i in range(3))))
+
+        self.assertEqual(len(ThreadRecordingFactory.threads), 3)
+        self.assertNotIn(threading.current_thread(),
+                         ThreadRecordingFactory.threads)
+        for i in range(3):
+            r = component.getAdapter(self.request, name='%d.html' % i)
+            self.assertEqual(r.__name__, '%d.html' % i)
+
+    def testFactoryRegisteredAfterLoading(self):
+        XMLConfig('meta.zcml', component)()
+        ThreadRecordingFactory.threads = []
+        xmlconfig(StringIO(
+            template %
+            '''
+            <browser:resource name="test.html" file="%s" />
+            <utility
+                component="
+                  zope.browserresource.tests.test_directives.ThreadRecordingFactory"
+                provides="
+                  zope.browserresource.interfaces.IResourceFactoryFactory"
+                name="txt" />
+            <browser:resource name="test.txt" file="%s" />
+            ''' % (os.path.join(tests_path, 'testfiles', 'test.html'),
+                   os.path.join(tests_path, 'testfiles', 'test.txt'))
+        ))
+
+        # The factory was registered after the files were loaded, so the
+        # resource is created when it is registered.
+        r = component.getAdapter(self.request, name='test.txt')
+        self.assertEqual(ThreadRecordingFactory.threads,
+                         [threading.current_thread()])
+        self.assertIsInstance(r, FileResource)
+
+    def testMissingFile(self):
+        config = StringIO(template % (
+            '<browser:resource name="test.html" file="%s" />'
+            % os.path.join(tests_path, 'testfiles', 'nothere.html')))
+        with self.assertRaises(ConfigurationError) as cm:
+            xmlconfig(config)
+        self.assertIn('nothere.html', str(cm.exception))
+        self.assertIn('line 5', str(cm.exception))
+
+    def testMissingI18nFile(self):
+        config = StringIO(
+            template %
+            '''
+            <browser:i18n-resource name="test" defaultLanguage="en">
+              <browser:translation language="en" file="%s" />
+              <browser:translation language="fr" file="%s" />
+            </browser:i18n-resource>
+            ''' % (os.path.join(tests_path, 'testfiles', 'test.html'),
+                   os.path.join(tests_path, 'testfiles', 'nothere.html'))
+        )
+        with self.assertRaises(ConfigurationError) as cm:
+            xmlconfig(config)
+        # The error points to the translation
+        self.assertIn('nothere.html', str(cm.exception))
+        self.assertIn('line 8', str(cm.exception))
+
+    def testLazyI18nResource(self):
+        path = os.path.join(tests_path, 'testfiles', 'test.html')
+        xmlconfig(StringIO(
+            template %
+            '''
+            <browser:i18n-resource name="test" lazy="true">
+              <browser:translation language="en" file="%s" />
+            </browser:i18n-resource>
+            ''' % path
+        ))
+
+        r = component.getAdapter(self.request, name='test')
+        self.assertIsNone(r._data['en']._data)
+        with open(path, 'rb') as f:
+            self.assertEqual(r._testData('en'), f.read())
+
     def testPluggableFactory(self):
 
         class ImageResource:
@@ -245,6 +359,38 @@ class TestZCML(cleanup.CleanUp, unittest.TestCase):
 
         self.assertRaises(ConfigurationError, xmlconfig, inexistent_dir)
 
+    def testIndexedDirectory(self):
+        path = os.path.join(tests_path, 'testfiles', 'subdir')
+
+        xmlconfig(StringIO(
+            template %
+            '''
+            <browser:resourceDirectory
+                name="dir"
+                directory="%s"
+                indexed="true"
+                />
+            ''' % path
+        ))
+
+        r = component.getAdapter(self.request, name='dir')
+        self.assertEqual(list(r.context.index), ['test.gif'])
+        self.assertIsInstance(r['test.gif'], FileResource)
+
+    def testResourceHosts(self):
+        xmlconfig(StringIO(
+            template %
+            '''
+            <browser:resourceHosts
+                urls="https://s1.example.com https://s2.example.com"
+                />
+            '''
+        ))
+
+        hosts = component.getUtility(IResourceHosts)
+        self.assertEqual(hosts.urls,
+                         ('https://s1.example.com', 'https://s2.example.com'))
+
     def test_SkinResource(self):
         self.assertEqual(
             component.queryAdapter(self.request, name='test'), None)
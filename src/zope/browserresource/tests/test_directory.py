@@ -35,6 +35,8 @@ from zope.traversing.browser.interfaces import IAbsoluteURL
 import zope.browserresource.tests as p
 from zope.browserresource.directory import DirectoryResource
 from zope.browserresource.directory import DirectoryResourceFactory
+from zope.browserresource.file import PRECOMPRESSED
+from zope.browserresource.file import File
 from zope.browserresource.file import FileResource
 from zope.browserresource.tests import support
 
@@ -152,6 +154,17 @@ class Test(support.SiteHandler, cleanup.CleanUp, TestCase):
         self.assertEqual(file(),
                          'http://127.0.0.1/@@/test_files/subdir/test.gif')
 
+    def testFingerprinted(self):
+        request = TestRequest()
+        path = os.path.join(test_directory, 'testfiles')
+        files = DirectoryResourceFactory(path, checker, 'test_files')(request)
+        fingerprint = files['test.txt'].fingerprint
+        file = files['test.%s.txt' % fingerprint]
+        self.assertTrue(file.fingerprinted)
+        self.assertEqual(file.__name__, 'test_files/test.txt')
+        self.assertFalse(files['test.txt'].fingerprinted)
+        self.assertRaises(NotFound, files.get, 'test.0123456789ab.txt')
+
     def testPluggableFactories(self):
         path = os.path.join(test_directory, 'testfiles')
         request = TestRequest()
@@ -177,6 +190,160 @@ class Test(support.SiteHandler, cleanup.CleanUp, TestCase):
         file = resource['test.txt']
         self.assertTrue(proxy.isinstance(file, FileResource))
 
+    def testFactoriesAreCached(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'test.txt')
+            with open(filename, 'w') as f:
+                f.write('first')
+            factory = DirectoryResourceFactory(path, checker, 'testfiles')
+
+            first = factory(TestRequest())['test.txt']
+            second = factory(TestRequest())['test.txt']
+            self.assertIs(first.context, second.context)
+            self.assertEqual(second.context.data, b'first')
+
+            # Changed files are read again
+            with open(filename, 'w') as f:
+                f.write('second')
+            st = os.stat(filename)
+            os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+            third = factory(TestRequest())['test.txt']
+            self.assertIsNot(third.context, second.context)
+            self.assertEqual(third.context.data, b'second')
+        finally:
+            shutil.rmtree(path)
+
+    def testFactoryCacheIsBounded(self):
+        path = os.path.join(test_directory, 'testfiles')
+
+        class SmallCacheFactory(DirectoryResourceFactory):
+            # test.txt and test.html, but not test.gif
+            cache_size = 48
+
+        factory = SmallCacheFactory(path, checker, 'testfiles')
+        resource = factory(TestRequest())
+        resource['test.txt']
+        resource['test.html']
+        cache = factory._DirectoryResourceFactory__dir.factories
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.size, 48)
+        resource['test.gif']
+        self.assertEqual(len(cache), 0)
+        resource['test.txt']
+        resource['test.html']
+        self.assertEqual(len(cache), 2)
+
+    def testFactoryCacheBoundsRetainedBytes(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        for dirname in ('', 'a', 'b'):
+            os.makedirs(os.path.join(path, dirname), exist_ok=True)
+            for i in range(20):
+                with open(os.path.join(path, dirname, '%d.txt' % i),
+                          'wb') as f:
+                    f.write(b'x' * 1000)
+
+        class SmallCacheFactory(DirectoryResourceFactory):
+            cache_size = 10000
+
+        factory = SmallCacheFactory(path, checker, 'files')
+        for dirname in ('', 'a', 'b'):
+            for i in range(20):
+                resource = factory(TestRequest())
+                if dirname:
+                    resource = resource[dirname]
+                self.assertEqual(resource['%d.txt' % i].GET(), b'x' * 1000)
+
+        # The subdirectories share the cache of the directory
+        cache = factory._DirectoryResourceFactory__dir.factories
+        self.assertIs(
+            factory(TestRequest())['a'].context.factories, cache)
+        retained = sum(file.size for file in factory.files())
+        self.assertLessEqual(retained, 10000)
+        self.assertEqual(retained, cache.size)
+
+    def testFactoriesAreNotCachedWithoutCache(self):
+        # Contexts that aren't a `Directory` may not have a cache.
+        class Context:
+            path = os.path.join(test_directory, 'testfiles')
+            checker = checker
+            index = None
+
+        resource = DirectoryResource(Context(), TestRequest())
+        resource.__name__ = 'files'
+        first = resource['test.txt']
+        self.assertIsNot(first.context, resource['test.txt'].context)
+        self.assertTrue(resource['subdir'])
+
+    def testIndexed(self):
+        path = tempfile.mkdtemp()
+        try:
+            os.mkdir(os.path.join(path, '.svn'))
+            os.mkdir(os.path.join(path, 'subdir'))
+            with open(os.path.join(path, 'test.txt'), 'w') as f:
+                f.write('')
+            with open(os.path.join(path, 'subdir', 'test.txt'), 'w') as f:
+                f.write('')
+            # Neither files nor directories
+            os.mkfifo(os.path.join(path, 'fifo'))
+            self.assertIsNone(
+                DirectoryResourceFactory(path, checker, 'testfiles')(
+                    TestRequest()).get('fifo', None))
+
+            factory = DirectoryResourceFactory(
+                path, checker, 'testfiles', indexed=True)
+            resource = factory(TestRequest())
+            self.assertEqual(
+                sorted(resource.context.index), ['.svn', 'subdir', 'test.txt'])
+
+            self.assertTrue(proxy.isinstance(resource['test.txt'],
+                                             FileResource))
+            self.assertIsNone(resource.get('.svn', None))
+            self.assertRaises(NotFound, resource.get, 'doesnotexist')
+
+            # Subdirectories are indexed as well
+            subdir = resource['subdir']
+            self.assertEqual(list(subdir.context.index), ['test.txt'])
+            self.assertTrue(subdir['test.txt'])
+
+            # New files are only found after refreshing the index
+            with open(os.path.join(path, 'new.txt'), 'w') as f:
+                f.write('')
+            self.assertIsNone(resource.get('new.txt', None))
+            factory.refresh()
+            self.assertTrue(resource.get('new.txt', None))
+        finally:
+            shutil.rmtree(path)
+
+    def testPrecompressedVariants(self):
+        path = tempfile.mkdtemp()
+        try:
+            for name in ('test.js', 'test.js.gz'):
+                with open(os.path.join(path, name), 'w') as f:
+                    f.write(name)
+            factory = DirectoryResourceFactory(path, checker, 'testfiles')
+            request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+            resource = factory(request)['test.js']
+            # Precompressed copies are only served when asked for
+            self.assertEqual(resource.GET(), b'test.js')
+            File.precompressed = PRECOMPRESSED
+            self.addCleanup(setattr, File, 'precompressed', ())
+            factory = DirectoryResourceFactory(path, checker, 'testfiles')
+            request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+            resource = factory(request)['test.js']
+            self.assertEqual(resource.GET(), b'test.js.gz')
+            self.assertEqual(request.response.getHeader('Content-Encoding'),
+                             'gzip')
+        finally:
+            shutil.rmtree(path)
+
+    def testRefreshNotIndexed(self):
+        path = os.path.join(test_directory, 'testfiles')
+        factory = DirectoryResourceFactory(path, checker, 'testfiles')
+        factory.refresh()
+        self.assertIsNone(factory(TestRequest()).context.index)
+
     def test_get_matches_forbidden(self):
         resource = DirectoryResource(None, None)
         with self.assertRaises(LookupError):
@@ -15,25 +15,54 @@
 """
 
 import doctest
+import gzip
 import os
+import shutil
+import socket
+import tempfile
 import time
 import unittest
+import weakref
+import wsgiref.util
 from email.utils import formatdate
 
 from zope.component import adapter
 from zope.component import getGlobalSiteManager
 from zope.component import provideAdapter
 from zope.interface import implementer
+from zope.interface import provider
 from zope.interface.verify import verifyObject
 from zope.publisher.browser import TestRequest
 from zope.publisher.interfaces.browser import IBrowserRequest
 from zope.security.checker import NamesChecker
 from zope.testing import cleanup
 
+from zope.browserresource.cache import CompressionCache
+from zope.browserresource.directory import Directory
+from zope.browserresource.directory import DirectoryResourceFactory
+from zope.browserresource.file import PRECOMPRESSED
+from zope.browserresource.file import ByteRangesResult
+from zope.browserresource.file import DigestETag
+from zope.browserresource.file import File
 from zope.browserresource.file import FileETag
+from zope.browserresource.file import FileResource
 from zope.browserresource.file import FileResourceFactory
+from zope.browserresource.file import FileResult
+from zope.browserresource.file import Offload
+from zope.browserresource.file import _dates
+from zope.browserresource.file import compute_digests
+from zope.browserresource.file import parse_date
+from zope.browserresource.file import parse_etag_set
+from zope.browserresource.i18nfile import I18nFileResourceFactory
+from zope.browserresource.interfaces import IDeterministicETagFactory
 from zope.browserresource.interfaces import IETag
+from zope.browserresource.interfaces import IFileETag
 from zope.browserresource.interfaces import IFileResource
+from zope.browserresource.metaconfigure import ResourceFactoryWrapper
+
+
+class SendfileWrapper(wsgiref.util.FileWrapper):
+    """The wsgi.file_wrapper of a server using os.sendfile."""
 
 
 @adapter(IFileResource, IBrowserRequest)
@@ -95,6 +124,665 @@ class TestFile(unittest.TestCase):
 
         self.assertEqual(etag_maker(1234, 'abc'), '1234-3')
 
+    def test_File_lazy(self):
+        file = File(self.testFilePath, 'test.txt', lazy=True)
+        self.assertIsNone(file._data)
+        self.assertEqual(file.content_type, 'text/plain')
+        self.assertIsNone(file._data)
+        self.assertTrue(file.lmh)
+
+        with open(self.testFilePath, 'rb') as f:
+            self.assertEqual(file.data, f.read())
+
+    def test_File_is_compact(self):
+        file = File(self.testFilePath, 'test.txt')
+        # Instances only use a dictionary when a setting is overridden
+        self.assertEqual(vars(file), {})
+        self.assertIs(file.variants, File(self.testFilePath, 'x').variants)
+        self.assertEqual(file.variants, {})
+
+        file = File(self.testFilePath, 'test.txt', lazy=True)
+        self.assertEqual(file.__dict__, {'lazy': True})
+        self.assertIsNone(file.resident_data)
+        self.assertIs(file.resident_data, file._data)
+
+    def test_compact_objects_take_other_attributes(self):
+        path = os.path.dirname(self.testFilePath)
+        for obj in [
+                File(self.testFilePath, 'test.txt'),
+                FileResourceFactory(
+                    self.testFilePath, self.nullChecker, 'test.txt'),
+                I18nFileResourceFactory({}, 'en'),
+                Directory(path, self.nullChecker, 'files'),
+                DirectoryResourceFactory(path, self.nullChecker, 'files'),
+                ResourceFactoryWrapper(
+                    FileResourceFactory, self.nullChecker, 'test.txt')]:
+            obj.custom = 1
+            self.assertEqual(obj.custom, 1)
+            self.assertIs(weakref.ref(obj)(), obj)
+
+    def test_File_lazy_sniffs_content_type(self):
+        path = os.path.join(os.path.dirname(self.testFilePath), 'test.html')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            unknown = os.path.join(tmpdir, 'page')
+            shutil.copy(path, unknown)
+            file = File(unknown, 'page', lazy=True)
+            self.assertIsNone(file._data)
+            self.assertEqual(file.content_type, 'text/html')
+            self.assertIsNotNone(file._data)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_File_lazy_default(self):
+        self.assertFalse(File(self.testFilePath, 'test.txt').lazy)
+        File.lazy = True
+        try:
+            file = File(self.testFilePath, 'test.txt')
+            self.assertIsNone(file._data)
+            file = File(self.testFilePath, 'test.txt', lazy=False)
+            self.assertIsNotNone(file._data)
+        finally:
+            File.lazy = False
+
+    def test_File_not_resident(self):
+        File.stream_threshold = 5
+        try:
+            file = File(self.testFilePath, 'test.txt')
+            self.assertIsNone(file._data)
+        finally:
+            File.stream_threshold = None
+        file.stream_threshold = 5
+        self.assertFalse(file.resident)
+        self.assertIsNone(file._data)
+        with open(self.testFilePath, 'rb') as f:
+            content = f.read()
+        self.assertEqual(file.size, len(content))
+        self.assertEqual(file.content_type, 'text/plain')
+        self.assertEqual(file.data, content)
+        self.assertIsNone(file._data)
+        with file.map() as mapped:
+            self.assertEqual(mapped[:], content)
+
+    def test_File_not_resident_sniffs_content_type(self):
+        path = os.path.join(os.path.dirname(self.testFilePath), 'test.html')
+        tmpdir = tempfile.mkdtemp()
+        try:
+            unknown = os.path.join(tmpdir, 'page')
+            shutil.copy(path, unknown)
+            file = File(unknown, 'page')
+            file.stream_threshold = 0
+            file._content_type = None
+            self.assertEqual(file.content_type, 'text/html')
+            self.assertIsNotNone(file._data)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_FileResource_GET_streams_large_files(self):
+        provideAdapter(FileETag)
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        file = factory._FileResourceFactory__file  # get mangled file
+        file.stream_threshold = 5
+        file._data = None
+
+        request = TestRequest()
+        resource = factory(request)
+        result = resource.GET()
+        self.assertIsInstance(result, FileResult)
+        with open(self.testFilePath, 'rb') as f:
+            content = f.read()
+
+        result.chunk_size = 7
+        chunks = list(result)
+        self.assertEqual(len(chunks[0]), 7)
+        self.assertEqual(b''.join(chunks), content)
+        self.assertEqual(request.response.getHeader('Content-Length'),
+                         str(len(content)))
+        self.assertEqual(request.response.getHeader('ETag'),
+                         '"{}-{}"'.format(file.lmt, len(content)))
+
+        request.response.setResult(result)
+        self.assertEqual(request.response.consumeBody(), content)
+
+    def _serve(self, request, result):
+        # Send the body of a response like a WSGI server with a
+        # wsgi.file_wrapper would, returning the bytes received by the
+        # client and whether os.sendfile could be used.
+        request.response.setResult(result)
+        body = request.response.consumeBodyIter()
+        server, client = socket.socketpair()
+        with server, client:
+            if isinstance(body, SendfileWrapper):
+                with body.filelike as f:
+                    server.sendfile(f)
+                sendfile = True
+            else:
+                for chunk in body:
+                    server.sendall(chunk)
+                sendfile = False
+            server.shutdown(socket.SHUT_WR)
+            with client.makefile('rb') as f:
+                return f.read(), sendfile
+
+    def test_FileResource_GET_file_wrapper(self):
+        provideAdapter(FileETag)
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        file = factory._FileResourceFactory__file  # get mangled file
+        with open(self.testFilePath, 'rb') as f:
+            content = f.read()
+
+        # Resident files are sent from memory by default
+        request = TestRequest(**{'wsgi.file_wrapper': SendfileWrapper})
+        self.assertEqual(self._serve(request, factory(request).GET()),
+                         (content, False))
+
+        request = TestRequest(**{'wsgi.file_wrapper': SendfileWrapper})
+        resource = factory(request)
+        resource.file_wrapper_threshold = 5
+        self.assertEqual(self._serve(request, resource.GET()),
+                         (content, True))
+        self.assertEqual(request.response.getHeader('Content-Length'),
+                         str(len(content)))
+
+        # Files that are not resident are always sent with it
+        file.stream_threshold = 5
+        file._data = None
+        request = TestRequest(**{'wsgi.file_wrapper': SendfileWrapper})
+        self.assertEqual(self._serve(request, factory(request).GET()),
+                         (content, True))
+
+        # Servers without a wsgi.file_wrapper get a FileResult
+        request = TestRequest()
+        result = factory(request).GET()
+        self.assertIsInstance(result, FileResult)
+        self.assertEqual(self._serve(request, result), (content, False))
+
+    def test_FileResource_GET_file_wrapper_fallback(self):
+        provideAdapter(FileETag)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'test.txt')
+        shutil.copy(self.testFilePath, path)
+        factory = FileResourceFactory(path, self.nullChecker, 'test.txt')
+
+        # Wrappers that can't provide IResult are not used
+        class SlottedWrapper:
+            __slots__ = ('filelike',)
+
+            def __init__(self, filelike, blksize):
+                self.filelike = filelike
+
+        request = TestRequest(**{'wsgi.file_wrapper': SlottedWrapper})
+        resource = factory(request)
+        resource.file_wrapper_threshold = 0
+        self.assertEqual(resource.GET(), b'test\ndata\n')
+
+        # Files that changed on disk are sent as they were loaded
+        with open(path, 'ab') as f:
+            f.write(b'more\n')
+        request = TestRequest(**{'wsgi.file_wrapper': SendfileWrapper})
+        resource = factory(request)
+        resource.file_wrapper_threshold = 0
+        self.assertEqual(resource.GET(), b'test\ndata\n')
+
+    def test_FileResult_stops_at_end_of_file(self):
+        with open(self.testFilePath, 'rb') as f:
+            content = f.read()
+        result = FileResult(self.testFilePath, len(content) + 100)
+        self.assertEqual(b''.join(result), content)
+
+    def _rangeFactory(self, stream=False):
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        file = factory._FileResourceFactory__file  # get mangled file
+        if stream:
+            file.stream_threshold = 5
+            file._data = None
+        return factory
+
+    def test_FileResource_GET_single_range(self):
+        for stream in (False, True):
+            factory = self._rangeFactory(stream)
+            request = TestRequest(HTTP_RANGE='bytes=5-')
+            body = factory(request).GET()
+            response = request.response
+            if stream:
+                body = b''.join(body)
+            self.assertEqual(body, b'data\n')
+            self.assertEqual(response.getStatus(), 206)
+            self.assertEqual(response.getHeader('Content-Range'),
+                             'bytes 5-9/10')
+            self.assertEqual(response.getHeader('Content-Length'), '5')
+            self.assertEqual(response.getHeader('Accept-Ranges'), 'bytes')
+
+    def test_FileResource_GET_multiple_ranges(self):
+        for stream in (False, True):
+            factory = self._rangeFactory(stream)
+            request = TestRequest(HTTP_RANGE='bytes=0-3,-3')
+            result = factory(request).GET()
+            response = request.response
+            self.assertEqual(response.getStatus(), 206)
+            content_type = response.getHeader('Content-Type')
+            self.assertTrue(
+                content_type.startswith('multipart/byteranges; boundary='))
+            boundary = content_type.split('=')[1]
+            body = b''.join(result)
+            self.assertEqual(response.getHeader('Content-Length'),
+                             str(len(body)))
+            self.assertEqual(body, (
+                '\r\n--{0}\r\n'
+                'Content-Type: text/plain\r\n'
+                'Content-Range: bytes 0-3/10\r\n\r\n'
+                'test'
+                '\r\n--{0}\r\n'
+                'Content-Type: text/plain\r\n'
+                'Content-Range: bytes 7-9/10\r\n\r\n'
+                'ta\n'
+                '\r\n--{0}--\r\n').format(boundary).encode())
+
+    def test_FileResource_GET_merges_ranges(self):
+        request = TestRequest(HTTP_RANGE='bytes=2-3,0-1,1-2')
+        self.assertEqual(self._rangeFactory()(request).GET(), b'test')
+        self.assertEqual(request.response.getStatus(), 206)
+        self.assertEqual(request.response.getHeader('Content-Range'),
+                         'bytes 0-3/10')
+
+    def test_FileResource_GET_too_many_ranges(self):
+        factory = self._rangeFactory()
+        # Ranges adding up to more than the file are ignored
+        request = TestRequest(HTTP_RANGE='bytes=' + ','.join(['0-'] * 2000))
+        self.assertEqual(factory(request).GET(), b'test\ndata\n')
+        self.assertIsNone(request.response.getHeader('Content-Range'))
+
+        # So are more ranges than allowed
+        request = TestRequest(HTTP_RANGE='bytes=0-0,2-2,4-4,6-6')
+        resource = factory(request)
+        resource.max_ranges = 3
+        self.assertEqual(resource.GET(), b'test\ndata\n')
+        self.assertIsNone(request.response.getHeader('Content-Range'))
+
+    def test_FileResource_GET_unsatisfiable_range(self):
+        request = TestRequest(HTTP_RANGE='bytes=100-')
+        self.assertEqual(self._rangeFactory()(request).GET(), b'')
+        self.assertEqual(request.response.getStatus(), 416)
+        self.assertEqual(request.response.getHeader('Content-Range'),
+                         'bytes */10')
+
+    def test_FileResource_GET_invalid_range(self):
+        request = TestRequest(HTTP_RANGE='bytes=5-1')
+        self.assertEqual(self._rangeFactory()(request).GET(),
+                         b'test\ndata\n')
+        self.assertIsNone(request.response.getHeader('Content-Range'))
+
+    def test_FileResource_GET_if_range(self):
+        factory = self._rangeFactory()
+        file = factory._FileResourceFactory__file  # get mangled file
+
+        def get(if_range):
+            request = TestRequest(HTTP_RANGE='bytes=0-3',
+                                  HTTP_IF_RANGE=if_range)
+            return factory(request).GET()
+
+        self.assertEqual(get('"myetag"'), b'test')
+        self.assertEqual(get('"otheretag"'), b'test\ndata\n')
+        self.assertEqual(get('W/"myetag"'), b'test\ndata\n')
+        self.assertEqual(get(file.lmh), b'test')
+        self.assertEqual(get(formatdate(file.lmt - 10, usegmt=True)),
+                         b'test\ndata\n')
+        self.assertEqual(get('bad date'), b'test\ndata\n')
+
+        provideAdapter(NoETag)
+        self.assertEqual(get('"myetag"'), b'test\ndata\n')
+
+    def test_FileResource_HEAD_accept_ranges(self):
+        request = TestRequest()
+        self._rangeFactory()(request).HEAD()
+        self.assertEqual(request.response.getHeader('Accept-Ranges'),
+                         'bytes')
+
+    def _precompressedFactory(self):
+        File.precompressed = PRECOMPRESSED
+        self.addCleanup(setattr, File, 'precompressed', ())
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'style.css')
+        for name, content in (('style.css', b'body {}'),
+                              ('style.css.gz', b'gzipped'),
+                              ('style.css.br', b'brotli')):
+            with open(os.path.join(tmpdir, name), 'wb') as f:
+                f.write(content)
+        return FileResourceFactory(path, self.nullChecker, 'style.css')
+
+    def test_File_precompressed_variants(self):
+        factory = self._precompressedFactory()
+        file = factory._FileResourceFactory__file  # get mangled file
+        self.assertEqual(list(file.variants), ['br', 'gzip'])
+        self.assertEqual(file.variants['gzip'].data, b'gzipped')
+        self.assertEqual(file.variants['gzip'].variants, {})
+
+        file = File(file.path, 'style.css', precompressed=())
+        self.assertEqual(file.variants, {})
+
+        File.precompressed = ()
+        file = File(file.path, 'style.css')
+        self.assertEqual(file.variants, {})
+
+    def test_FileResource_GET_precompressed(self):
+        factory = self._precompressedFactory()
+
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(factory(request).GET(), b'gzipped')
+        response = request.response
+        self.assertEqual(response.getHeader('Content-Encoding'), 'gzip')
+        self.assertEqual(response.getHeader('Content-Type'), 'text/css')
+        self.assertEqual(response.getHeader('Vary'), 'Accept-Encoding')
+        self.assertEqual(response.getHeader('ETag'), '"myetag-gzip"')
+
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(factory(request).GET(), b'brotli')
+        self.assertEqual(request.response.getHeader('Content-Encoding'),
+                         'br')
+
+        request = TestRequest()
+        self.assertEqual(factory(request).GET(), b'body {}')
+        response = request.response
+        self.assertIsNone(response.getHeader('Content-Encoding'))
+        self.assertEqual(response.getHeader('Vary'), 'Accept-Encoding')
+        self.assertEqual(response.getHeader('ETag'), '"myetag"')
+
+        # Conditional requests are checked against the ETag of the variant
+        request = TestRequest(HTTP_ACCEPT_ENCODING='br',
+                              HTTP_IF_NONE_MATCH='"myetag"')
+        self.assertEqual(factory(request).GET(), b'brotli')
+        request = TestRequest(HTTP_ACCEPT_ENCODING='br',
+                              HTTP_IF_NONE_MATCH='"myetag-br"')
+        self.assertEqual(factory(request).GET(), b'')
+        self.assertEqual(request.response.getStatus(), 304)
+
+    def test_FileResource_HEAD_precompressed(self):
+        factory = self._precompressedFactory()
+        request = TestRequest(HTTP_ACCEPT_ENCODING='br')
+        response = request.response
+        response.setResult(factory(request).HEAD())
+        self.assertEqual(response.consumeBody(), b'')
+        self.assertEqual(response.getHeader('Content-Encoding'), 'br')
+        self.assertEqual(response.getHeader('Content-Length'), '6')
+        self.assertEqual(response.getHeader('Vary'), 'Accept-Encoding')
+
+    def test_FileResource_GET_offload(self):
+        factory = self._precompressedFactory()
+        tmpdir = os.path.dirname(factory._FileResourceFactory__file.path)
+        offload = Offload(locations={tmpdir: '/internal/static/'})
+
+        request = TestRequest(HTTP_RANGE='bytes=0-1')
+        resource = factory(request)
+        resource.offload = offload
+        self.assertEqual(resource.GET(), b'')
+        response = request.response
+        self.assertEqual(response.getHeader('X-Accel-Redirect'),
+                         '/internal/static/style.css')
+        # The front-end server answers range requests
+        self.assertIsNone(response.getHeader('Content-Range'))
+        self.assertEqual(response.getHeader('Content-Type'), 'text/css')
+        self.assertEqual(response.getHeader('ETag'), '"myetag"')
+        self.assertIsNone(response.getHeader('Content-Length'))
+
+        # Precompressed variants are offloaded as well
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+        resource = factory(request)
+        resource.offload = offload
+        self.assertEqual(resource.GET(), b'')
+        response = request.response
+        self.assertEqual(response.getHeader('X-Accel-Redirect'),
+                         '/internal/static/style.css.gz')
+        self.assertEqual(response.getHeader('Content-Encoding'), 'gzip')
+
+        # Conditional requests are still answered by the application
+        request = TestRequest(HTTP_IF_NONE_MATCH='"myetag"')
+        resource = factory(request)
+        resource.offload = offload
+        self.assertEqual(resource.GET(), b'')
+        self.assertEqual(request.response.getStatus(), 304)
+        self.assertIsNone(request.response.getHeader('X-Accel-Redirect'))
+
+        # Small files are sent by the application
+        offload.min_size = 1024
+        request = TestRequest()
+        resource = factory(request)
+        resource.offload = offload
+        self.assertEqual(resource.GET(), b'body {}')
+        self.assertIsNone(request.response.getHeader('X-Accel-Redirect'))
+
+    def test_Offload_location(self):
+        file = File(self.testFilePath, 'test.txt')
+        testfiles = os.path.dirname(self.testFilePath)
+        offload = Offload('X-Sendfile')
+        self.assertEqual(offload.location(file), self.testFilePath)
+
+        offload = Offload('X-Sendfile', {testfiles: '/mnt/files'})
+        self.assertEqual(offload.location(file), '/mnt/files/test.txt')
+
+        # Nested directories may be mapped differently
+        offload = Offload(locations={
+            os.path.dirname(testfiles): '/tests',
+            testfiles + os.sep: '/files'})
+        self.assertEqual(offload.location(file), '/files/test.txt')
+
+        # URIs are quoted
+        file.path = os.path.join(testfiles, 'a file?.txt')
+        self.assertEqual(offload.location(file), '/files/a%20file%3F.txt')
+
+        # Files outside of all directories are not offloaded
+        self.assertIsNone(Offload().location(file))
+        self.assertIsNone(offload.location(object()))
+
+    def test_FileResource_GET_compression_cache(self):
+        factory = self._precompressedFactory()
+        file = factory._FileResourceFactory__file  # get mangled file
+        file.variants = {}
+        file.data = b'body { color: red; }\n' * 100
+
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(factory(request).GET(), file.data)
+        self.assertIsNone(request.response.getHeader('Vary'))
+
+        cache = CompressionCache()
+        factory.resourceClass = type(
+            'CompressingResource', (factory.resourceClass,),
+            {'compression_cache': cache})
+
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+        body = factory(request).GET()
+        self.assertEqual(gzip.decompress(body), file.data)
+        response = request.response
+        self.assertEqual(response.getHeader('Content-Encoding'), 'gzip')
+        self.assertEqual(response.getHeader('Vary'), 'Accept-Encoding')
+        self.assertEqual(response.getHeader('ETag'), '"myetag-gzip"')
+        self.assertEqual(response.getHeader('Content-Type'), 'text/css')
+
+        saved = len(file.data) - len(body)
+        self.assertEqual(cache.bytes_saved, saved)
+
+        # Revalidations and HEAD requests don't count as saving bytes,
+        # and revalidations don't compress the file.
+        cache._cache.clear()
+        for i in range(3):
+            request = TestRequest(HTTP_ACCEPT_ENCODING='gzip',
+                                  HTTP_IF_NONE_MATCH='"myetag-gzip"')
+            self.assertEqual(factory(request).GET(), b'')
+            self.assertEqual(request.response.getStatus(), 304)
+        self.assertEqual(cache.size, 0)
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+        factory(request).HEAD()
+        self.assertEqual(request.response.getHeader('Content-Length'),
+                         str(len(body)))
+        self.assertEqual(cache.bytes_saved, saved)
+
+        # Ranges refer to the compressed body
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip',
+                              HTTP_RANGE='bytes=-5')
+        self.assertEqual(factory(request).GET(), body[-5:])
+        # Compressed for the first GET and, after clearing, the HEAD
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        request = TestRequest()
+        self.assertEqual(factory(request).GET(), file.data)
+        self.assertEqual(request.response.getHeader('Vary'),
+                         'Accept-Encoding')
+
+        # Responses that don't get smaller are sent uncompressed
+        file.data = os.urandom(2000)
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(factory(request).GET(), file.data)
+        self.assertIsNone(request.response.getHeader('Content-Encoding'))
+        self.assertEqual(request.response.getHeader('ETag'), '"myetag"')
+        request = TestRequest(HTTP_ACCEPT_ENCODING='gzip')
+        factory(request).HEAD()
+        self.assertIsNone(request.response.getHeader('Content-Encoding'))
+        self.assertEqual(request.response.getHeader('ETag'), '"myetag"')
+
+    def test_DigestETag(self):
+        etag_maker = DigestETag(object(), TestRequest())
+        self.assertTrue(verifyObject(IFileETag, etag_maker))
+
+        file = File(self.testFilePath, 'test.txt')
+        self.assertEqual(len(file.digest), 32)
+        self.assertEqual(etag_maker(file.lmt, file.data), file.digest)
+        self.assertEqual(etag_maker.fileETag(file), file.digest)
+
+        # The digest doesn't depend on the modification time
+        etag = etag_maker(1234, b'test\ndata\n')
+        self.assertEqual(etag, etag_maker(5678, b'test\ndata\n'))
+        self.assertEqual(etag, file.digest)
+
+    def test_DigestETag_without_digest(self):
+        class Context:
+            lmt = 1234
+            data = b'test\ndata\n'
+
+        etag_maker = DigestETag(object(), TestRequest())
+        self.assertEqual(etag_maker.fileETag(Context()),
+                         etag_maker(1234, Context.data))
+
+    def test_File_digest(self):
+        file = File(self.testFilePath, 'test.txt')
+        streamed = File(self.testFilePath, 'test.txt')
+        streamed.stream_threshold = 5
+        self.assertEqual(streamed.digest, file.digest)
+
+        files = [File(self.testFilePath, 'test.txt') for i in range(3)]
+        compute_digests(files)
+        self.assertEqual([f._digest for f in files], [file.digest] * 3)
+
+        # Assigning the contents changes the digest
+        digest = file.digest
+        file.data = b'changed'
+        self.assertNotEqual(file.digest, digest)
+
+    def test_File_fixed_lmt(self):
+        File.fixed_lmt = 1234
+        try:
+            file = File(self.testFilePath, 'test.txt')
+        finally:
+            File.fixed_lmt = None
+        self.assertEqual(file.lmt, 1234.0)
+        self.assertEqual(file.lmh, 'Thu, 01 Jan 1970 00:20:34 GMT')
+
+    def test_FileResource_GET_digest_etag(self):
+        provideAdapter(DigestETag, provides=IETag)
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        file = factory._FileResourceFactory__file  # get mangled file
+        request = TestRequest()
+        factory(request).GET()
+        self.assertEqual(request.response.getHeader('ETag'),
+                         '"%s"' % file.digest)
+
+    def test_FileResource_fingerprint(self):
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        file = factory._FileResourceFactory__file  # get mangled file
+        resource = factory(TestRequest())
+        self.assertEqual(resource.fingerprint, file.digest[:12])
+        self.assertFalse(resource.fingerprinted)
+
+    def test_FileResource_fingerprint_without_digest(self):
+        class Context:
+            pass
+
+        resource = FileResource(Context(), TestRequest())
+        self.assertIsNone(resource.fingerprint)
+
+    def test_FileResource_GET_fingerprinted(self):
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        request = TestRequest()
+        resource = factory(request)
+        resource.fingerprinted = True
+        self.assertTrue(resource.GET())
+        self.assertEqual(request.response.getHeader('Cache-Control'),
+                         'public,max-age=31536000,immutable')
+
+        request = TestRequest()
+        resource = factory(request)
+        resource.fingerprinted = True
+        resource.HEAD()
+        self.assertEqual(request.response.getHeader('Cache-Control'),
+                         'public,max-age=31536000,immutable')
+
+    def test_File_headers(self):
+        file = File(self.testFilePath, 'test.txt')
+        headers = file.headers()
+        self.assertEqual(headers, (
+            ('Content-Type', 'text/plain'),
+            ('Content-Length', '10'),
+            ('Last-Modified', file.lmh),
+            ('Accept-Ranges', 'bytes'),
+        ))
+        self.assertIs(file.headers(), headers)
+
+        file.data = b'changed'
+        self.assertEqual(file.headers()[1], ('Content-Length', '7'))
+
+    def test_File_headers_content_type(self):
+        file = File(self.testFilePath, 'test.txt')
+        file.headers()
+        file.content_type = 'text/x-test'
+        self.assertEqual(file.headers()[0], ('Content-Type', 'text/x-test'))
+
+    def test_FileResource_GET_context_without_headers(self):
+        class Context:
+            content_type = 'text/plain'
+            lmt = 1234
+            lmh = 'Thu, 01 Jan 1970 00:20:34 GMT'
+            data = b'test\ndata\n'
+
+        request = TestRequest()
+        resource = FileResource(Context(), request)
+        self.assertEqual(resource.GET(), Context.data)
+        response = request.response
+        self.assertEqual(response.getHeader('Content-Type'), 'text/plain')
+        self.assertEqual(response.getHeader('Last-Modified'), Context.lmh)
+
+    def test_ByteRangesResult_content_type(self):
+        file = File(self.testFilePath, 'test.txt')
+        result = ByteRangesResult(file, [(0, 1), (2, 3)], 10, 'sep')
+        self.assertIn(b'Content-Type: text/plain', b''.join(result))
+
+    def test_FileResource_HEAD_sets_entity_headers(self):
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        request = TestRequest()
+        resource = factory(request)
+        response = request.response
+        # The headers are kept when the publisher sets the result.
+        response.setResult(resource.HEAD())
+        self.assertEqual(response.consumeBody(), b'')
+        self.assertEqual(response.getHeader('Content-Length'), '10')
+        self.assertEqual(response.getHeader('ETag'), '"myetag"')
+
     def test_FileResource_GET_sets_cache_headers(self):
         # Test caching headers set by FileResource.GET
         factory = FileResourceFactory(
@@ -267,6 +955,52 @@ class TestFile(unittest.TestCase):
         resource = factory(request)
         self.assertTrue(resource.GET())
 
+    def test_FileResource_caches_deterministic_etags(self):
+        calls = []
+
+        @provider(IDeterministicETagFactory)
+        class CountingETag(FileETag):
+            def __call__(self, mtime, content):
+                calls.append(mtime)
+                return super().__call__(mtime, content)
+
+        provideAdapter(CountingETag, provides=IETag)
+        factory = FileResourceFactory(
+            self.testFilePath, self.nullChecker, 'test.txt')
+        file = factory._FileResourceFactory__file  # get mangled file
+        for i in range(3):
+            factory(TestRequest()).GET()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(list(file.etags.values()), ['%s-10' % file.lmt])
+
+        # A new modification time gives a new ETag
+        file.lmt += 1
+        factory(TestRequest()).GET()
+        self.assertEqual(len(calls), 2)
+
+        # Adapters that don't declare themselves deterministic are
+        # always called.
+        provideAdapter(MyETag)
+        factory(TestRequest()).GET()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(file.etags), 2)
+
+        file.data = b'changed'
+        self.assertEqual(file.etags, {})
+
+    def test_parsed_headers_are_cached(self):
+        header = '"foo", "bar"'
+        self.assertIs(parse_etag_set(header), parse_etag_set(header))
+
+        header = 'Thu, 01 Jan 1970 00:20:34 GMT'
+        self.assertEqual(parse_date(header), 1234)
+        hits = _dates.hits
+        self.assertEqual(parse_date(header), 1234)
+        self.assertEqual(_dates.hits, hits + 1)
+
+        self.assertIsNone(parse_date('invalid'))
+        self.assertIn('invalid', _dates)
+
     def test_FileResource_GET_works_without_IETag_adapter(self):
         # Test backwards compatibility with users of <3.11 that do not provide
         # an ETagAdatper
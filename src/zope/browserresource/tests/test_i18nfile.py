@@ -160,7 +160,7 @@ class Test(AbstractTestII18nAwareMixin, cleanup.CleanUp, TestCase):
         resource = I18nFileResourceFactory(
             self._createDict('test.txt'), 'en')(TestRequest())
 
-        self.assertEqual(resource.HEAD(), b'')
+        self.assertEqual(list(resource.HEAD()), [])
 
         response = resource.request.response
         self.assertEqual(response.getHeader('Content-Type'), 'text/plain')
@@ -170,7 +170,7 @@ class Test(AbstractTestII18nAwareMixin, cleanup.CleanUp, TestCase):
             self._createDict('test.txt'), 'en')(
             TestRequest(HTTP_ACCEPT_LANGUAGE='lt'))
 
-        self.assertEqual(resource.HEAD(), b'')
+        self.assertEqual(list(resource.HEAD()), [])
 
         response = resource.request.response
         self.assertEqual(response.getHeader('Content-Type'), 'text/plain')
@@ -180,7 +180,7 @@ class Test(AbstractTestII18nAwareMixin, cleanup.CleanUp, TestCase):
             self._createDict('test.html', 'test2.html'), 'en')(
             TestRequest(HTTP_ACCEPT_LANGUAGE='fr'))
 
-        self.assertEqual(resource.HEAD(), b'')
+        self.assertEqual(list(resource.HEAD()), [])
 
         response = resource.request.response
         self.assertEqual(response.getHeader('Content-Type'), 'text/html')
@@ -0,0 +1,236 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Build-time manifest tests.
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from zope.component import provideAdapter
+from zope.interface import Interface
+from zope.interface.verify import verifyObject
+from zope.publisher.interfaces.browser import IDefaultBrowserLayer
+from zope.security.checker import NamesChecker
+from zope.testing import cleanup
+
+from zope.browserresource.directory import DirectoryResourceFactory
+from zope.browserresource.file import PRECOMPRESSED
+from zope.browserresource.file import File
+from zope.browserresource.file import FileResourceFactory
+from zope.browserresource.i18nfile import I18nFileResourceFactory
+from zope.browserresource.interfaces import IFileMetadataSource
+from zope.browserresource.manifest import MANIFEST
+from zope.browserresource.manifest import Manifest
+from zope.browserresource.manifest import _process
+from zope.browserresource.manifest import build
+from zope.browserresource.manifest import main
+from zope.browserresource.manifest import resource_paths
+
+
+CSS = b'body { color: red; }\n' * 50
+
+
+class TestManifest(cleanup.CleanUp, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.tmpdir, 'src')
+        self.out = os.path.join(self.tmpdir, 'out')
+        os.makedirs(os.path.join(self.src, 'sub'))
+        os.makedirs(os.path.join(self.src, '.git'))
+        self.css = self._write('style.css', CSS)
+        self.png = self._write('sub/image.png', b'\x89PNG\r\n\x1a\n')
+        self._write('.git/config', b'')
+
+    def tearDown(self):
+        File.metadata = None
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+    def _write(self, name, data):
+        path = os.path.join(self.src, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _touch(self, path):
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_build(self):
+        manifest = build([self.css, self.png], self.out, 1)
+        self.assertEqual(Manifest.load(self.out).files, manifest.files)
+
+        entry = manifest.files[self.css]
+        file = File(self.css, 'style.css')
+        self.assertEqual(entry['content_type'], 'text/css')
+        self.assertEqual(entry['digest'], file.digest)
+        self.assertEqual(entry['size'], len(CSS))
+        self.assertEqual(list(entry['variants']), ['gzip'])
+        with gzip.open(os.path.join(
+                self.out, entry['variants']['gzip'])) as f:
+            self.assertEqual(f.read(), CSS)
+
+        # Images are not compressed
+        entry = manifest.files[self.png]
+        self.assertEqual(entry['content_type'], 'image/png')
+        self.assertEqual(entry['variants'], {})
+
+    def test_build_is_incremental(self):
+        build([self.css, self.png], self.out, 1)
+        # Pretend the entries were computed differently, so we can tell
+        # whether they are computed again.
+        path = os.path.join(self.out, MANIFEST)
+        with open(path) as f:
+            data = json.load(f)
+        for entry in data['files'].values():
+            entry['digest'] = 'old'
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+        self._touch(self.png)
+        manifest = build([self.css, self.png], self.out, 1)
+        self.assertEqual(manifest.files[self.css]['digest'], 'old')
+        self.assertNotEqual(manifest.files[self.png]['digest'], 'old')
+
+        # Missing compressed copies are written again.
+        gz = os.path.join(
+            self.out, manifest.files[self.css]['variants']['gzip'])
+        os.remove(gz)
+        manifest = build([self.css], self.out, 1)
+        self.assertNotEqual(manifest.files[self.css]['digest'], 'old')
+        self.assertTrue(os.path.isfile(gz))
+        self.assertEqual(list(manifest.files), [self.css])
+
+    def test_build_removes_unused_variants(self):
+        manifest = build([self.css], self.out, 1)
+        old = os.path.join(
+            self.out, manifest.files[self.css]['variants']['gzip'])
+        self._write('style.css', CSS * 2)
+        self._touch(self.css)
+        manifest = build([self.css], self.out, 1)
+        new = os.path.join(
+            self.out, manifest.files[self.css]['variants']['gzip'])
+        self.assertTrue(os.path.isfile(new))
+        self.assertFalse(os.path.exists(old))
+
+        # Copies removed by hand don't matter
+        os.remove(new)
+        self._write('style.css', CSS)
+        self._touch(self.css)
+        build([self.css], self.out, 1)
+        self.assertTrue(os.path.isfile(old))
+
+    def test_process(self):
+        # Compressing is done in worker processes, which is hard to
+        # observe directly.
+        os.makedirs(self.out)
+        entry = _process(self.css, self.out, File.digest_factory)
+        gz = os.path.join(self.out, entry['variants']['gzip'])
+        mtime = os.stat(gz).st_mtime_ns
+        self.assertEqual(
+            _process(self.css, self.out, File.digest_factory), entry)
+        # Existing copies are reused
+        self.assertEqual(os.stat(gz).st_mtime_ns, mtime)
+
+        # Compressed copies that are not smaller are left out
+        short = self._write('short.txt', b'a')
+        entry = _process(short, self.out, File.digest_factory)
+        self.assertEqual(entry['content_type'], 'text/plain')
+        self.assertEqual(entry['variants'], {})
+
+    def test_load(self):
+        self.assertEqual(Manifest.load(self.out).files, {})
+        os.makedirs(self.out)
+        with open(os.path.join(self.out, MANIFEST), 'w') as f:
+            json.dump({'version': 0, 'files': {self.css: {}}}, f)
+        self.assertEqual(Manifest.load(self.out).files, {})
+
+    def test_lookup(self):
+        manifest = build([self.css], self.out, 1)
+        verifyObject(IFileMetadataSource, manifest)
+        self.assertIsNone(manifest.lookup(self.png, os.stat(self.png)))
+        metadata = manifest.lookup(self.css, os.stat(self.css))
+        self.assertEqual(metadata['content_type'], 'text/css')
+        self.assertEqual(metadata['variants'], {
+            'gzip': os.path.join(
+                self.out, manifest.files[self.css]['variants']['gzip'])})
+        # Changed files are not looked up
+        self._touch(self.css)
+        self.assertIsNone(manifest.lookup(self.css, os.stat(self.css)))
+
+    def test_File_uses_metadata(self):
+        manifest = build([self.css], self.out, 1)
+        entry = manifest.files[self.css]
+        File.metadata = manifest
+        file = File(self.css, 'style.css')
+        # The file isn't read until it is needed
+        self.assertIsNone(file._data)
+        self.assertEqual(file.content_type, 'text/css')
+        self.assertEqual(file.digest, entry['digest'])
+        self.assertIsNone(file._data)
+        self.assertEqual(file.data, CSS)
+        self.assertEqual(file.variants['gzip'].path, os.path.join(
+            self.out, entry['variants']['gzip']))
+
+        # Precompressed copies next to the file are preferred
+        gz = self._write('style.css.gz', gzip.compress(CSS))
+        File.precompressed = PRECOMPRESSED
+        self.addCleanup(setattr, File, 'precompressed', ())
+        file = File(self.css, 'style.css')
+        self.assertEqual(file.variants['gzip'].path, gz)
+
+        # Files not in the manifest are read as usual
+        file = File(self.png, 'image.png')
+        self.assertEqual(file._data, b'\x89PNG\r\n\x1a\n')
+
+    def test_resource_paths(self):
+        checker = NamesChecker()
+        text = self._write('text.txt', b'text')
+        for name, factory in [
+                ('style.css', FileResourceFactory(
+                    self.css, checker, 'style.css')),
+                ('dir', DirectoryResourceFactory(self.src, checker, 'dir')),
+                ('text', I18nFileResourceFactory(
+                    {'en': File(text, 'text')}, 'en'))]:
+            provideAdapter(factory, (IDefaultBrowserLayer,), Interface, name)
+        # Not a resource
+        provideAdapter(lambda request: None, (IDefaultBrowserLayer,),
+                       Interface, 'other')
+        self.assertEqual(resource_paths(), [self.css, self.png, text])
+
+    def test_main(self):
+        zcml = self._write('site.zcml', b'''\
+<configure xmlns="http://namespaces.zope.org/browser">
+  <include xmlns="http://namespaces.zope.org/zope"
+           package="zope.browserresource" file="meta.zcml" />
+  <resource name="style.css" file="style.css" />
+</configure>
+''')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main([zcml, self.out, '-j', '1'])
+        self.assertIn('1 files', output.getvalue())
+        self.assertEqual(list(Manifest.load(self.out).files), [self.css])
+        self.assertFalse(File.lazy)
+
+
+def test_suite():
+    return unittest.defaultTestLoader.loadTestsFromName(__name__)
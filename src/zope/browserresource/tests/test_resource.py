@@ -13,6 +13,7 @@
 ##############################################################################
 """Unit tests for Resource
 """
+import doctest
 import unittest
 
 import zope.component.interfaces
@@ -22,7 +23,10 @@ from zope.traversing.browser.absoluteurl import AbsoluteURL
 from zope.traversing.browser.interfaces import IAbsoluteURL
 
 from zope import component
+from zope.browserresource.interfaces import IResourceHosts
+from zope.browserresource.resource import FingerprintedAbsoluteURL
 from zope.browserresource.resource import Resource
+from zope.browserresource.resource import ResourceHosts
 from zope.browserresource.tests import support
 
 
@@ -67,6 +71,69 @@ class TestResource(support.SiteHandler, cleanup.CleanUp, unittest.TestCase):
         r.__name__ = 'foo'
         self.assertEqual(r(), 'http://cdn.example.com/@@/foo')
 
+    def testSiteURLComputedOncePerRequest(self):
+        calls = []
+
+        def resourceBase(site, request):
+            calls.append(site)
+            return 'http://cdn.example.com'
+        component.provideAdapter(
+            resourceBase,
+            (zope.component.interfaces.ISite, TestRequest),
+            IAbsoluteURL, 'resource')
+
+        req = TestRequest()
+        req._vh_root = support.site
+        for name in ('foo', 'bar'):
+            r = Resource(req)
+            r.__parent__ = support.site
+            r.__name__ = name
+            self.assertEqual(r(), 'http://cdn.example.com/@@/' + name)
+        self.assertEqual(len(calls), 1)
+
+        req = TestRequest()
+        r = Resource(req)
+        r.__name__ = 'foo'
+        self.assertEqual(r(), 'http://cdn.example.com/@@/foo')
+        self.assertEqual(len(calls), 2)
+
+        # Requests without annotations compute it each time
+        del req.annotations
+        self.assertEqual(r(), 'http://cdn.example.com/@@/foo')
+        self.assertEqual(len(calls), 3)
+
+    def testResourceHosts(self):
+        component.provideUtility(
+            ResourceHosts('https://static.example.com/'), IResourceHosts)
+        req = TestRequest()
+        r = Resource(req)
+        r.__name__ = 'foo'
+        self.assertEqual(r(), 'https://static.example.com/@@/foo')
+
+        component.provideUtility(
+            ResourceHosts('https://s1.example.com', 'https://s2.example.com'),
+            IResourceHosts)
+        r.__name__ = 'style.css'
+        self.assertEqual(r(), 'https://s2.example.com/@@/style.css')
+        r.__name__ = '++resource++logo.png'
+        self.assertEqual(r(), 'https://s1.example.com/@@/logo.png')
+
+        self.assertRaises(ValueError, ResourceHosts)
+
+    def testFingerprintedURL(self):
+        component.provideAdapter(FingerprintedAbsoluteURL)
+        req = TestRequest()
+        r = Resource(req)
+        req._vh_root = support.site
+        r.__parent__ = support.site
+        r.__name__ = 'dir/foo.css'
+        self.assertEqual(r(), 'http://127.0.0.1/@@/dir/foo.css')
+        r.fingerprint = '0123456789ab'
+        self.assertEqual(r(), 'http://127.0.0.1/@@/dir/foo.0123456789ab.css')
+
 
 def test_suite():
-    return unittest.defaultTestLoader.loadTestsFromTestCase(TestResource)
+    return unittest.TestSuite((
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestResource),
+        doctest.DocTestSuite('zope.browserresource.resource'),
+    ))
@@ -15,9 +15,26 @@
 """
 
 import doctest
+import os
 import unittest
 
+from zope.component import getSiteManager
+from zope.component import provideAdapter
+from zope.component import queryAdapter
+from zope.interface import Interface
+from zope.publisher.browser import TestRequest
+from zope.publisher.interfaces.browser import IDefaultBrowserLayer
+from zope.security.checker import NamesChecker
 from zope.testing import cleanup
+from zope.traversing.browser.absoluteurl import AbsoluteURL
+from zope.traversing.browser.interfaces import IAbsoluteURL
+
+from zope.browserresource.file import FileResourceFactory
+from zope.browserresource.resource import FingerprintedAbsoluteURL
+from zope.browserresource.resources import Resources
+from zope.browserresource.resources import _registered
+from zope.browserresource.resources import queryResource
+from zope.browserresource.tests import support
 
 
 def setUp(test):
@@ -28,8 +45,75 @@ def tearDown(test):
     cleanup.tearDown()
 
 
+class TestQueryResource(cleanup.CleanUp, unittest.TestCase):
+
+    def test_queryResource(self):
+        provideAdapter(lambda request: 'first',
+                       (IDefaultBrowserLayer,), Interface, 'first')
+        request = TestRequest()
+        self.assertEqual(queryResource(request, 'first'), 'first')
+        self.assertIsNone(queryResource(request, 'second'))
+
+        # New registrations are found
+        provideAdapter(lambda request: 'second',
+                       (IDefaultBrowserLayer,), Interface, 'second')
+        self.assertEqual(queryResource(request, 'second'), 'second')
+        self.assertEqual(queryResource(request, 'second'),
+                         queryAdapter(request, name='second'))
+
+        # Factories returning None are treated as missing
+        provideAdapter(lambda request: None,
+                       (IDefaultBrowserLayer,), Interface, 'none')
+        self.assertIsNone(queryResource(request, 'none'))
+
+        getSiteManager().unregisterAdapter(
+            required=(IDefaultBrowserLayer,), provided=Interface,
+            name='first')
+        self.assertIsNone(queryResource(request, 'first'))
+
+    def test_queryResource_unknown_names(self):
+        request = TestRequest()
+        queryResource(request, 'probe')
+        size = len(_registered)
+        for i in range(100):
+            self.assertIsNone(queryResource(request, 'probe%d' % i))
+        self.assertEqual(len(_registered), size)
+
+
+class TestURLs(support.SiteHandler, cleanup.CleanUp, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        provideAdapter(AbsoluteURL, (None, None), IAbsoluteURL)
+        path = os.path.join(os.path.dirname(__file__), 'testfiles')
+        for name in ('test.txt', 'test.html'):
+            provideAdapter(
+                FileResourceFactory(
+                    os.path.join(path, name), NamesChecker(), name),
+                (IDefaultBrowserLayer,), Interface, name)
+        self.request = TestRequest()
+        self.request._vh_root = support.site
+        self.resources = Resources(support.site, self.request)
+
+    def test_urls(self):
+        names = ['test.txt', 'test.html', 'test.txt']
+        self.assertEqual(self.resources.urls(names),
+                         [self.resources[name]() for name in names])
+        self.assertEqual(self.resources.urls(names)[0],
+                         'http://127.0.0.1/@@/test.txt')
+        self.assertEqual(self.resources.urls([]), [])
+
+    def test_urls_fingerprinted(self):
+        provideAdapter(FingerprintedAbsoluteURL)
+        url, = self.resources.urls(['test.txt'])
+        fingerprint = self.resources['test.txt'].fingerprint
+        self.assertEqual(url, 'http://127.0.0.1/@@/test.%s.txt' % fingerprint)
+
+
 def test_suite():
     return unittest.TestSuite((
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestQueryResource),
+        unittest.defaultTestLoader.loadTestsFromTestCase(TestURLs),
         doctest.DocTestSuite(
             'zope.browserresource.resources',
             setUp=setUp, tearDown=tearDown,